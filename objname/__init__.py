@@ -7,14 +7,34 @@
 'y'
 """
 
+from array import array
 from collections import deque
-from types import FrameType
-from typing import Iterator, Optional, TypeVar, List, Deque, Tuple, Any, Dict
+from types import CodeType, FrameType, MemberDescriptorType
+from typing import (
+    Iterable, Iterator, Optional, TypeVar, List, Tuple, Any, Dict, Type,
+    Counter, Set, Mapping, Callable, TYPE_CHECKING)
+import atexit
+import copy
+import dis
+import functools
+import math
 import opcode
+import pickle
+import random
+import re
 import sys
+import threading
+import time
+import weakref
 
 
-__all__ = ["AutoName"]
+__all__ = [
+    "AutoName", "SlottedAutoName", "enable_stats", "disable_stats", "stats",
+    "format_stats", "install_import_hook", "uninstall_import_hook", "warm",
+    "enable_disk_cache", "disable_disk_cache", "flush_disk_cache",
+    "pack_objects", "unpack_objects", "verify", "verification",
+    "register_resolver",
+]
 __version__ = "0.12.2"
 
 
@@ -28,9 +48,29 @@ _STORE_ATTR = opcode.opmap["STORE_ATTR"]
 _STORE_GLOBAL = opcode.opmap["STORE_GLOBAL"]
 _STORE_FAST = opcode.opmap["STORE_FAST"]
 _STORE_DEREF = opcode.opmap["STORE_DEREF"]
+_JUMP_FORWARD = opcode.opmap["JUMP_FORWARD"]
+_RETURN_VALUE = opcode.opmap["RETURN_VALUE"]
 
+# The instruction that awaits an object since python 3.11. It jumps to the
+# instruction that takes the result.
+_SEND = opcode.opmap.get("SEND")
 
-_T = TypeVar("_T", bound="AutoName")
+# Python 3.12 gives the offset of the inline cache of SEND as the 'lasti'
+# of the frame that awaits.
+_SEND_CACHE_LASTI = sys.version_info[:2] == (3, 12)
+
+# The flag of the code of functions. Their local variables are not in a
+# dict, unlike the namespace of modules and class bodies.
+_CO_OPTIMIZED = 0x0001
+
+# Superinstructions of python 3.13. The argument has the index of two
+# local variables, four bits each one. The first one is stored, then the
+# second one is stored or loaded.
+_STORE_FAST_STORE_FAST = opcode.opmap.get("STORE_FAST_STORE_FAST")
+_STORE_FAST_LOAD_FAST = opcode.opmap.get("STORE_FAST_LOAD_FAST")
+
+
+_T = TypeVar("_T", bound="_AutoNameBase")
 
 
 # Instructions related with store the name of an object somewhere.
@@ -43,30 +83,1173 @@ _ALLOWED_INSTRUCTIONS = {
 # So I need to check wich python version to fill the following set.
 if sys.version_info >= (3, 11, 0, "alpha", 0):
     _ALLOWED_INSTRUCTIONS.add(opcode.opmap["COPY"])
-    _ALLOWED_INSTRUCTIONS.add(opcode.opmap["CACHE"])
 else:
     _ALLOWED_INSTRUCTIONS.add(opcode.opmap["DUP_TOP"])
 
+# Since python 3.13 the copy tested by 'x = A() or default' is converted
+# to bool first.
+if "TO_BOOL" in opcode.opmap:
+    _ALLOWED_INSTRUCTIONS.add(opcode.opmap["TO_BOOL"])
+
+
+# Since python 3.12 'x = A() or default' and 'x = A() and default' copy
+# the object, test the copy and pop the object if the default is taken.
+# So, if the object was copied, the jump carries it to the store
+# instruction. Otherwise the object is tested and it is not stored.
+_TEST_INSTRUCTIONS = {
+    opcode.opmap[opname]
+    for opname in ("POP_JUMP_IF_TRUE", "POP_JUMP_IF_FALSE")
+    if sys.version_info >= (3, 12)
+}
+
+
+# Amount of inline caches after each instruction. They were added in
+# python 3.11. The table is indexed by name since python 3.13.
+_CACHE_ENTRIES = [0] * 256
+_inline_cache_entries = getattr(opcode, "_inline_cache_entries", [])
+if isinstance(_inline_cache_entries, dict):
+    for _opname, _entries in _inline_cache_entries.items():
+        if _opname in opcode.opmap:
+            _CACHE_ENTRIES[opcode.opmap[_opname]] = _entries
+    del _opname, _entries
+else:
+    _CACHE_ENTRIES[:len(_inline_cache_entries)] = _inline_cache_entries
+del _inline_cache_entries
+
+
+# Instructions that prove that the object will not be stored anywhere.
+# They are calls, raises, pops and jumps. RETURN_VALUE returns the object
+# to the caller, which can store it. The jumps that can carry the object to
+# a store instruction are not included.
+_STOP_INSTRUCTIONS = {
+    opcode.opmap[opname]
+    for opname in (
+        "CALL", "PRECALL", "CALL_FUNCTION", "CALL_FUNCTION_KW",
+        "CALL_FUNCTION_EX", "CALL_METHOD", "CALL_KW", "RETURN_CONST",
+        "YIELD_VALUE", "POP_TOP", "RAISE_VARARGS", "RERAISE",
+    )
+    if opname in opcode.opmap
+}
+
+# Since python 3.12 the jumps include pseudo instructions, whose numbers
+# are bigger than 255. They are never in the bytecode.
+_STOP_INSTRUCTIONS.update(
+    instruction
+    for instruction in opcode.hasjrel + opcode.hasjabs
+    if instruction < 256
+)
+_STOP_INSTRUCTIONS.difference_update(
+    opcode.opmap[opname]
+    for opname in (
+        "JUMP_FORWARD", "FOR_ITER", "SEND", "JUMP_IF_FALSE_OR_POP",
+        "JUMP_IF_TRUE_OR_POP", "SETUP_WITH", "SETUP_ASYNC_WITH",
+    )
+    if opname in opcode.opmap
+)
+_STOP_INSTRUCTIONS.difference_update(_TEST_INSTRUCTIONS)
+
+
+# Search the frame where the object was created. 'frame' is the caller
+# of AutoName.__init__. The frames of the __init__ methods of the class
+# are skipped, so that it works with any chain of super().__init__()
+# calls. The same code object can not be found twice in that chain. If
+# it is, the object was created inside an __init__ method of their own
+# class.
+#
+# 'init_depths' has the id of the code object of each __init__ method,
+# and how many frames there are from there to the frame where the object
+# was created. The amount of frames is stored, so that AutoName.__init__
+# doesn't search them again. It is zero until it is known.
+def _search_frame(
+    init_depths: Dict[int, int],
+    frame: FrameType,
+) -> Optional[FrameType]:
+    first_code = id(frame.f_code)
+    seen: List[int] = []
+    current: Optional[FrameType] = frame
+    while current is not None:
+        code = id(current.f_code)
+        if code not in init_depths or code in seen:
+            break
+        seen.append(code)
+        current = current.f_back
+    init_depths[first_code] = len(seen)
+    return current
+
+
+# The slow path of the search of the frame where the object was created,
+# used the first time and each time that the frames of the __init__
+# methods are not the usual ones. 'frame' is the caller of
+# AutoName.__init__. The first amount of frames that is found is cached
+# in the class, with the code of the last __init__ method, so that the
+# next objects get their frame with a single sys._getframe() call.
+def _find_frame(cls: Any, frame: FrameType) -> Optional[FrameType]:
+    init_depths = cls._init_depths
+    depth = init_depths.get(id(frame.f_code))
+    if depth is None:
+        return frame
+    if depth == 0:
+        if _search_frame(init_depths, frame) is None:
+            return None
+        depth = init_depths[id(frame.f_code)]
+    inner: Optional[FrameType] = frame
+    for _ in range(depth - 1):
+        inner = inner.f_back  # type: ignore[union-attr]
+    if inner is None:
+        return None
+    if not cls._init_depth:
+        cls._init_code = inner.f_code
+        cls._init_depth = depth
+    return inner.f_back
+
+
+# The id of the code objects of the __init__ methods that can be in the
+# call stack of AutoName.__init__. Decorated methods also have the code
+# of the wrapped functions.
+def _init_depths(cls: type) -> Dict[int, int]:
+    depths = {}
+    for base in cls.__mro__:
+        if base is _AutoNameBase:
+            continue
+        function = vars(base).get("__init__")
+        while function is not None:
+            code = getattr(function, "__code__", None)
+            if code is not None:
+                depths[id(code)] = 0
+            function = getattr(function, "__wrapped__", None)
+    return depths
+
+
+# The slots whose value is part of the state of an object.
+def _state_slots(cls: type) -> Tuple[str, ...]:
+    slots = []
+    for base in cls.__mro__:
+        names = vars(base).get("__slots__", ())
+        if isinstance(names, str):
+            names = (names,)
+        for slot in names:
+            if slot in ("name", "_unpacking", "__dict__", "__weakref__"):
+                continue
+
+            # The code object of the origin can't be pickled.
+            if slot == "origin" and cls._origin:  # type: ignore[attr-defined]
+                continue
+
+            # The private names are mangled.
+            if slot.startswith("__") and not slot.endswith("__"):
+                slot = f"_{base.__name__.lstrip('_')}{slot}"
+            slots.append(slot)
+    return tuple(slots)
+
+
+# Kinds of instructions, as the scanner see them.
+_OTHER = 0
+_ALLOWED = 1
+_UNPACK = 2
+_STORE = 3
+_STOP = 4
+_JUMP = 5
+_STORE_TWICE = 6
+_STORE_THEN_LOAD = 7
+_RETURN = 8
+_AWAIT = 9
+_TEST = 10
+
+
+# Kind of each one of the 256 possible opcodes.
+_DISPATCH = [_OTHER] * 256
+for _instruction in _ALLOWED_INSTRUCTIONS:
+    _DISPATCH[_instruction] = _ALLOWED
+for _instruction in _STOP_INSTRUCTIONS:
+    _DISPATCH[_instruction] = _STOP
+for _instruction in _TEST_INSTRUCTIONS:
+    _DISPATCH[_instruction] = _TEST
+_DISPATCH[_UNPACK_SEQUENCE] = _UNPACK
+_DISPATCH[_JUMP_FORWARD] = _JUMP
+_DISPATCH[_RETURN_VALUE] = _RETURN
+if _SEND is not None:
+    _DISPATCH[_SEND] = _AWAIT
+for _instruction in (_STORE_NAME, _STORE_ATTR, _STORE_GLOBAL, _STORE_FAST,
+                     _STORE_DEREF):
+    _DISPATCH[_instruction] = _STORE
+del _instruction
+if _STORE_FAST_STORE_FAST is not None:
+    _DISPATCH[_STORE_FAST_STORE_FAST] = _STORE_TWICE
+if _STORE_FAST_LOAD_FAST is not None:
+    _DISPATCH[_STORE_FAST_LOAD_FAST] = _STORE_THEN_LOAD
+
+
+# Translation tables from each opcode to their kind and to the amount of
+# code units until the next instruction.
+_KINDS = bytes(_DISPATCH)
+_STEPS = bytes(1 + entries for entries in _CACHE_ENTRIES)
+
+
+# Kinds of the instructions whose argument is needed by the scanner.
+_DECODED_KINDS = re.compile(b"[%s]" % bytes(
+    (_UNPACK, _STORE, _JUMP, _STORE_TWICE, _STORE_THEN_LOAD, _AWAIT,
+     _TEST)))
+
+
+# The name found for single and multiple assignment (None if there is no
+# one) and the names found for each iterable unpacking. The names of the
+# iterable unpacking are None if the object is returned to the caller.
+_Resolution = Tuple[Optional[str], Optional[Tuple[Tuple[str, ...], ...]]]
+
+
+# Since python 3.11 the argument of STORE_FAST and STORE_DEREF is an index
+# of the same table. It has the local variables, then the cell variables
+# that are not arguments and then the free variables.
+def _localsplus_names(code: CodeType) -> Tuple[str, ...]:
+    cellvars = tuple(n for n in code.co_cellvars if n not in code.co_varnames)
+    return code.co_varnames + cellvars + code.co_freevars
+
+
+# Code compiled many times from the same string, e.g. by exec(), gives
+# a new code object each time, with the same data. So, the decoded data
+# of the last code objects compiled from strings is also indexed by their
+# content, and it is kept after their code object is destroyed. The
+# content is all that decode() reads. The amount of code objects and of
+# bytecode kept is bounded. The resolutions found later by any of them
+# are shared too, because all of them keep the same dict of sites.
+#
+# The code of a file is compiled once, so it is not worth to share it. By
+# convention, the name of the file of the code compiled from a string is
+# between angle brackets, e.g. '<string>'.
+#
+# There is no lock. If many threads share data at the same time, some of
+# it can be decoded twice, and the amount of bytecode is approximated.
+_SHARED_INFOS = 128
+_SHARED_BYTECODE = 4 * 1024 * 1024
+_shared_infos: Dict[Tuple[Any, ...], "_CodeInfo"] = {}
+_shared_bytecode = 0
+
+
+# The dict is kept in the order of use, so the first one is the least
+# recently used.
+def _share(key: Tuple[Any, ...], info: "_CodeInfo") -> None:
+    global _shared_bytecode
+    if _shared_infos.setdefault(key, info) is not info:
+        return
+    _shared_bytecode += len(key[0])
+    while len(_shared_infos) > _SHARED_INFOS or (
+            _shared_bytecode > _SHARED_BYTECODE and len(_shared_infos) > 1):
+        try:
+            oldest = next(iter(_shared_infos))
+            del _shared_infos[oldest]
+        except (KeyError, RuntimeError, StopIteration):
+
+            # Other thread changed the dict meanwhile.
+            continue
+        _shared_bytecode -= len(oldest[0])
+
+
+class _CodeInfo:
+    """Data of a code object shared by all the call sites inside it.
+
+    The bytecode is decoded once. Every Python instruction takes 2 bytes.
+    The first byte represent the instruction, and the second byte is
+    their argument. Since python 3.11 some instructions are followed by
+    inline caches, that also take 2 bytes each one. ``kinds`` has the kind
+    of each instruction and ``steps`` how far is the next one, skipping
+    the caches. Both are indexed by the offset of the instruction divided
+    by two. ``args`` has the argument of each store, unpack and jump
+    instruction, with the EXTENDED_ARG prefix already applied. The
+    argument of each store instruction is already replaced by the stored
+    name, or by both names if it is a superinstruction that stores two
+    local variables, and the argument of JUMP_FORWARD and SEND by the
+    index of the target. ``sites`` has the resolution of each call site,
+    indexed by their offset.
+
+    The bytecode is decoded by the first scan, so that it is never decoded
+    if all the resolutions are loaded from the disk cache. ``kinds`` is
+    None until then.
+
+    The code objects with the same bytecode and names have the same data.
+    So, prepare() shares it, see _shared_infos.
+    """
+
+    __slots__ = ("ref", "kinds", "steps", "args", "sites")
+
+    def __init__(self, ref: "weakref.ref[CodeType]") -> None:
+        self.ref = ref
+        self.kinds: Optional[bytes] = None
+        self.sites: Dict[int, _Resolution] = {}
+
+    def decode(self, code: CodeType) -> None:
+        if sys.version_info >= (3, 11):
+            fast_names = deref_names = _localsplus_names(code)
+        else:
+            fast_names = code.co_varnames
+            deref_names = code.co_cellvars + code.co_freevars
+        stored_names = {
+            _STORE_NAME: code.co_names,
+            _STORE_ATTR: code.co_names,
+            _STORE_GLOBAL: code.co_names,
+            _STORE_FAST: fast_names,
+            _STORE_DEREF: deref_names,
+        }
+        bytecode = code.co_code
+
+        # The whole bytecode is translated by C code. Only the few
+        # instructions with an useful argument are decoded here.
+        instructions = bytecode[::2]
+        kinds = instructions.translate(_KINDS)
+        steps = instructions.translate(_STEPS)
+        args: Dict[int, Any] = {}
+        for match in _DECODED_KINDS.finditer(kinds):
+            index = match.start()
+            instruction = instructions[index]
+            arg = bytecode[2 * index + 1]
+            prefix = index - 1
+            shift = 8
+            while prefix >= 0 and instructions[prefix] == _EXTENDED_ARG:
+                arg |= bytecode[2 * prefix + 1] << shift
+                prefix -= 1
+                shift += 8
+            kind = kinds[index]
+            if kind == _STORE:
+                args[index] = stored_names[instruction][arg]
+            elif kind == _STORE_TWICE:
+                args[index] = (fast_names[arg >> 4], fast_names[arg & 15])
+            elif kind == _STORE_THEN_LOAD:
+                args[index] = fast_names[arg >> 4]
+            elif kind == _JUMP or kind == _AWAIT or kind == _TEST:
+
+                # Before python 3.10 the argument of a jump was in bytes.
+                if sys.version_info < (3, 10):
+                    arg //= 2
+                args[index] = index + steps[index] + arg
+            else:
+                args[index] = arg
+
+        # Other threads can scan the same code meanwhile. The kinds are
+        # set at the end, because they mean that the code is decoded.
+        self.steps = steps
+        self.args = args
+        self.kinds = kinds
+
+    # Take the data of other code object with the same content, if any.
+    # Otherwise decode the bytecode and share the data with the next code
+    # objects with the same content.
+    def prepare(self, code: CodeType) -> None:
+        if not code.co_filename.startswith("<"):
+            self.decode(code)
+            return
+        key = (code.co_code, code.co_names, code.co_varnames,
+               code.co_cellvars, code.co_freevars)
+        shared = _shared_infos.pop(key, None)
+        if shared is None:
+            self.decode(code)
+            _share(key, self)
+        else:
+            _shared_infos[key] = shared
+            self.sites = shared.sites
+            self.steps = shared.steps
+            self.args = shared.args
+            self.kinds = shared.kinds
+
+
+# Search the names where the object created by the call at the 'lasti'
+# offset of the code object will be stored.
+def _scan(info: _CodeInfo, lasti: int) -> _Resolution:
+    if info.kinds is None:
+        info.prepare(info.ref())  # type: ignore[arg-type]
+
+        # Other code object with the same content can have the name.
+        resolution = info.sites.get(lasti)
+        if resolution is not None:
+            if _stats is not None:
+                _stats.hits += 1
+            return resolution
+
+    # Python can create many names with iterable unpacking syntax and
+    # multiple assignment syntax. That is why it store them all.
+    multiple_names: List[str] = []
+    slices: List[Tuple[int, int]] = []
+    delta = 0
+    kinds: bytes = info.kinds  # type: ignore[assignment]
+    steps = info.steps
+    args = info.args
+
+    # lasti indicates the position of the last bytecode instruction.
+    # In this case, it is the call to the class. So, it skip them and
+    # start in the next instruction. If it awaits a factory instead, the
+    # object is taken at the target of the jump, see _resolve_factory().
+    index = lasti // 2
+    if kinds[index] == _AWAIT:
+        index = args[index]
+    else:
+        index += steps[index]
+    returned = False
+    copied = False
+    stop = len(kinds)
+    scanned = 0
+    while index < stop:
+        scanned += 1
+        kind = kinds[index]
+        if kind == _STORE:
+            multiple_names.append(args[index])
+        elif kind == _STORE_TWICE:
+            multiple_names.extend(args[index])
+
+        # The object is not used by the load that follows the store.
+        elif kind == _STORE_THEN_LOAD:
+            multiple_names.append(args[index])
+            break
+        elif kind == _UNPACK:
+
+            # The argument is the amount of variables that want to unpack.
+            # Store slices because names that will
+            # be used are not known at this point.
+            begin = len(multiple_names)
+            end = begin + args[index]
+            slice_ = (begin - delta, end - delta)
+            slices.append(slice_)
+            delta = end - begin
+        elif multiple_names:
+            if kind != _ALLOWED:
+                break
+
+        # Nothing has been stored yet. So, an object that is not stored at
+        # this point will never be stored. The scanner follows the jump of
+        # expressions like 'x = A() if c else B()'.
+        elif kind == _STOP:
+            break
+        elif kind == _RETURN:
+            returned = True
+            break
+        elif kind == _JUMP:
+            index = args[index]
+            continue
+        elif kind == _TEST:
+            if not copied:
+                break
+            index = args[index]
+            copied = False
+            continue
+        copied = kind == _ALLOWED
+        index += steps[index]
+
+    # Iterable unpacking syntax
+    iterable_names: List[Tuple[str, ...]] = []
+    for begin, end in slices:
+
+        # Store names that will be used in iterable unpacking
+        iterable_names.append(tuple(multiple_names[begin:end]))
+
+        # Remove unneeded names that will be
+        # used in single or multiple assignment
+        del multiple_names[begin:end]
+
+    if _stats is not None:
+        _stats.misses += 1
+        _stats.scanned += scanned
+    if returned:
+        return None, None
+
+    # [NOTE 1]: The correct name is the last one because
+    # that is how __set_name__ behaves in the same situation.
+    name = multiple_names[-1] if multiple_names else None
+    return name, tuple(iterable_names)
+
+
+# Data of each code object, indexed by their id. The weak reference of
+# each code object is stored with their data, so that it is forgotten
+# when the code object is destroyed. That way dynamically compiled code
+# doesn't leak and an id reused by another code object never gets stale
+# data.
+_code_infos: Dict[int, _CodeInfo] = {}
+
+
+# The resolutions persisted on disk. It is None while the disk cache is
+# disabled.
+_disk_cache: Any = None
+
+
+def _get_code_info(code: CodeType) -> _CodeInfo:
+    info = _code_infos.get(id(code))
+    if info is None:
+        key = id(code)
+
+        def forget(_: "weakref.ref[CodeType]") -> None:
+            _code_infos.pop(key, None)
+            if _stats is not None:
+                _stats.evict(key)
+
+        # Other thread can create the data of the same code object
+        # meanwhile. Only one of them is kept.
+        new_info = _CodeInfo(weakref.ref(code, forget))
+        info = _code_infos.setdefault(key, new_info)
+        if info is new_info and _disk_cache is not None:
+            _disk_cache.load(code, info.sites)
+    return info
+
+
+# The same call site always gives the same names. So, it only scan
+# the bytecode the first time that the call site is executed.
+def _resolve(code: CodeType, lasti: int) -> _Resolution:
+    info = _get_code_info(code)
+    resolution = info.sites.get(lasti)
+    if resolution is None:
+        resolution = info.sites[lasti] = _scan(info, lasti)
+    else:
+        if _stats is not None:
+            _stats.hits += 1
+        if _verifier is not None and _verifier.due():
+            _verifier.check(code, lasti, resolution, "cache")
+    return resolution
+
+
+# Scan the bytecode each time, without the call site cache. The decoded
+# bytecode is still shared.
+def _rescan(code: CodeType, lasti: int) -> _Resolution:
+    return _scan(_get_code_info(code), lasti)
+
 
-# Get the frame where the object was created
-# to search the name of such object there.
-def _get_frame(deepness: int) -> Optional[FrameType]:
+# Never search the name. The objects only get the names given by
+# named(), from_names() and the import hook.
+def _no_resolution(code: CodeType, lasti: int) -> _Resolution:
+    return None, ()
+
+
+# A resolver receives the code object and the offset of the call where
+# the object was created, and returns their names.
+_Resolver = Callable[[CodeType, int], _Resolution]
+
+
+# The resolvers that the subclasses can select with the 'resolver'
+# keyword, indexed by their name.
+_resolvers: Dict[str, _Resolver] = {
+    "cache": _resolve,
+    "scan": _rescan,
+    "explicit": _no_resolution,
+}
+
+
+def register_resolver(name: str, resolver: _Resolver) -> None:
+    """Register a resolver that the subclasses of AutoName can select by
+    their name, e.g. 'class Symbol(AutoName, resolver="name")'. It is
+    called with the code object and the offset of the call where the
+    object was created, and it returns the name of the single or
+    multiple assignment (None if there is no one) and a tuple with the
+    names of each iterable unpacking. The built-in ones are "cache", the
+    default, "scan" and "explicit".
+    """
+    if name in _resolvers:
+        raise ValueError(f"resolver {name!r} is already registered")
+    _resolvers[name] = resolver
+
+
+# Search the name of an object returned by factory functions. The caller
+# of each factory is searched, up to 'depth' of them, until one of them
+# doesn't return the object too. Each call site is resolved by
+# _resolve(), so that each one is scanned only once, and each caller
+# costs a dict lookup. 'code' and 'lasti' are the call site where the
+# object was created. Its frame is searched from the caller of
+# AutoName.__init__.
+def _resolve_factory(depth: int, code: CodeType, lasti: int) -> _Resolution:
+    frame: Optional[FrameType] = sys._getframe(2)
     try:
+        while frame is not None and (
+                frame.f_code is not code or frame.f_lasti != lasti):
+            frame = frame.f_back
+        for _ in range(depth):
+            if frame is None:
+                break
+            frame = frame.f_back
+            if frame is None:
+                break
+            caller = frame.f_code
+            caller_lasti = frame.f_lasti
+            if _SEND_CACHE_LASTI and caller.co_code[caller_lasti - 2] == _SEND:
+                caller_lasti -= 2
+            resolution = _resolve(caller, caller_lasti)
+            if resolution[1] is not None:
+                if _verifier is not None and _verifier.due():
+                    _verifier.check(
+                        caller, caller_lasti, resolution, "factory")
+                return resolution
+    finally:
+        del frame
+    return None, ()
+
+
+# Search the name of a lazy object by identity in the namespace of the
+# module or the class body where it was created. So, the construction
+# doesn't scan the bytecode, and the objects whose name is never read
+# never pay for it. It is None if the object is not there, e.g. it is
+# used in iterable unpacking syntax or it was created in a function, or
+# if it has many names there, e.g. after 'y = x', because only the
+# bytecode knows which one was assigned. Then the bytecode is scanned.
+def _search_namespace(
+    instance: Any, namespace: Mapping[Any, Any]
+) -> Optional[str]:
+    found = None
+    try:
+        for key, value in namespace.items():
+            if value is instance:
+                if found is not None:
+                    return None
+                found = key
+
+    # Other thread changed the namespace meanwhile.
+    except RuntimeError:
+        return None
+    return found if isinstance(found, str) else None
+
+
+# The default value of the name attribute. It also searches the name of
+# lazy objects the first time that it is read.
+class _DefaultName:
+    def __get__(self, instance: Any, owner: Any = None) -> str:
+        if instance is None:
+            return "<nameless>"
+        return instance._resolve_lazy()  # type: ignore[no-any-return]
+
+
+class _Origin:
+    """Where an object was created. Only the code object and the offset of
+    the call are stored. The other attributes are computed each time that
+    they are read.
+    """
+
+    __slots__ = ("code", "lasti")
+
+    def __init__(self, code: CodeType, lasti: int) -> None:
+        self.code = code
+        self.lasti = lasti
+
+    @property
+    def filename(self) -> str:
+        return self.code.co_filename
+
+    @property
+    def line(self) -> Optional[int]:
+        return _line_number(self.code, self.lasti)
+
+    # Before python 3.11 only the name of the function is known.
+    @property
+    def qualname(self) -> str:
+        return getattr(self.code, "co_qualname", self.code.co_name)
+
+    def __repr__(self) -> str:
+        return f"<origin {_location(self.code, self.lasti)}>"
+
+
+# A weak reference that knows where it is in the registry.
+class _RegistryRef(weakref.ref):  # type: ignore[type-arg]
+    __slots__ = ("name", "key")
+    name: str
+    key: int
+
+
+class _Registry:
+    """The live objects of a class, indexed by their name. There can be
+    many objects with the same name. They are kept in the order that they
+    got their names.
+
+    The objects are added and removed with a lock, because other thread
+    can remove the dict of a name while an object is added to it. They
+    are read without the lock. It is reentrant, because the garbage
+    collector can remove an object while other one is added.
+    """
+
+    __slots__ = ("objects", "lock")
+
+    def __init__(self) -> None:
+        self.objects: Dict[str, Dict[int, _RegistryRef]] = {}
+        self.lock = threading.RLock()
+
+    def add(self, instance: Any) -> None:
+        ref = _RegistryRef(instance, self.forget)
+        ref.name = instance.name
+        ref.key = id(instance)
+        self.insert(ref)
+
+    def insert(self, ref: _RegistryRef) -> None:
+        with self.lock:
+            refs = self.objects.get(ref.name)
+            if refs is None:
+                refs = self.objects[ref.name] = {}
+            refs[ref.key] = ref
+
+    # Move an object to its new name, if it is in the registry. Its
+    # reference is found between the weak references to the object.
+    def rename(self, instance: Any, name: str) -> None:
+        for ref in weakref.getweakrefs(instance):
+            if (isinstance(ref, _RegistryRef) and ref.name != name
+                    and ref.__callback__ == self.forget):
+                with self.lock:
+                    self.forget(ref)
+                    ref.name = name
+                    self.insert(ref)
+
+    def forget(self, ref: _RegistryRef) -> None:
+        with self.lock:
+            refs = self.objects.get(ref.name)
+            if refs is not None and refs.get(ref.key) is ref:
+                del refs[ref.key]
+                if not refs:
+                    del self.objects[ref.name]
+
+    def live(self, name: str) -> Iterator[Any]:
+        for ref in list(self.objects.get(name, {}).values()):
+            instance = ref()
+            if instance is not None:
+                yield instance
+
+
+# The __setattr__ method of the classes with a registry. It indexes the
+# objects again when their name is changed.
+def _renaming_setattr(
+    setattr: Callable[[Any, str, Any], None],
+) -> Callable[[Any, str, Any], None]:
+    def __setattr__(self: Any, attr: str, value: Any) -> None:
+        setattr(self, attr, value)
+        if attr == "name":
+            registry = self._registry
+            if registry is not None:
+                registry.rename(self, value)
+
+    __setattr__._renaming = True  # type: ignore[attr-defined]
+    return __setattr__
 
-        # Deepness is plus one because the current funcion add a frame
-        return sys._getframe(deepness + 1)
-    except ValueError as error:
-        if error.args == ('call stack is not deep enough',):
 
-            # There is a case where if the user define a subclass of AutoName
-            # in the main global namespace, then the deepness is the same than
-            # before minus one. But since the current function add one, just
-            # use the original value obtained.
-            return sys._getframe(deepness)
-        raise error
+class _AutoNameBase:
+    """Implementation shared by AutoName and SlottedAutoName."""
+
+    # The attributes are declared below for the type checker, because the
+    # slots are only defined by SlottedAutoName.
+    if not TYPE_CHECKING:
+        __slots__ = ()
+    _init_depths: Dict[int, int] = {}
+
+    # The amount of frames of the __init__ methods that are usually in the
+    # call stack of AutoName.__init__, and the code of the last one. They
+    # are zero and None until the first object is created, see
+    # _find_frame().
+    _init_depth = 0
+    _init_code: Optional[CodeType] = None
+
+    # If the constructor arguments are kept when the object
+    # is not used in iterable unpacking syntax.
+    _keep_args = True
+
+    # If the name is searched the first time that it is read.
+    _lazy = False
+
+    # If the name of a lazy object is searched first in the namespace
+    # where it was created, see _search_namespace().
+    _reverse_lookup = False
+
+    # The live objects of the class indexed by their name, if the class
+    # was created with registry=True. The subclasses share it.
+    _registry: Optional[_Registry] = None
+
+    # If the class was created with origin=True, where each object was
+    # created. It is None otherwise, or if it was created with a known
+    # name, e.g. by from_names().
+    _origin = False
+    origin: Optional[_Origin] = None
+
+    # How many factory functions that return the object are skipped to
+    # search their name, see _resolve_factory().
+    _factory_depth = 0
+
+    # The resolver selected with the 'resolver' keyword. It is None for
+    # the call site cache, that is inlined in AutoName.__init__.
+    _resolver: Optional[_Resolver] = None
+
+    # The name of such resolver, that is the path checked by verify(). It
+    # is None if the resolver is checked elsewhere, as the call site cache,
+    # or if there is nothing to check, as the 'explicit' resolver, that
+    # never searches the name.
+    _resolver_name: Optional[str] = None
+
+    # AutoName.__new__ only stores the arguments, so _create_named() skips
+    # it if there is no other __new__ method to call. AutoName.__init__
+    # has nothing to do there, so it is only called if it is overridden.
+    _plain_new = True
+    _init_overridden = False
+
+    # If the metaclass overrides type.__call__, so that the import hook
+    # can't skip it.
+    _metaclass_call = False
+
+    # The slots of the subclasses, that are pickled and copied, and if
+    # a subclass has their own __getstate__ method.
+    _state_slots: Tuple[str, ...] = ()
+    _custom_state = False
+
+    # The constructor arguments. If the object is used in iterable
+    # unpacking syntax, there is also a deque with the names needed. The
+    # code object, the offset of the call and the namespace to search are
+    # there instead if the object is lazy and the name was not searched
+    # yet.
+    _unpacking: Optional[Tuple[Any, ...]]
+    name: str
+
+    def __new__(
+        cls: Type[_T],
+        *args: Tuple[Any, ...],
+        **kwargs: Dict[str, Any]
+    ) -> _T:
+        new_obj = super().__new__(cls)  # type: ignore[misc]
+        new_obj._unpacking = (args, kwargs)
+        return new_obj  # type: ignore[no-any-return]
+
+    def __init__(self) -> None:
+
+        # The name was already given by _create_named()
+        if _named_instances and id(self) in _named_instances:
+            return
+
+        # Get the frame where the object was created to search the name
+        # of such object there. The frames of the overridden __init__
+        # methods are skipped.
+        depth = self._init_depth
+        if depth:
+            init_frame = sys._getframe(depth)
+            if init_frame.f_code is self._init_code:
+                frame = init_frame.f_back
+            else:
+                frame = _find_frame(type(self), sys._getframe(1))
+            if frame is None:
+                return
+        elif self._init_depths:
+            frame = _find_frame(type(self), sys._getframe(1))
+            if frame is None:
+                return
+        else:
+            frame = sys._getframe(1)
+        try:
+            code = frame.f_code
+            lasti = frame.f_lasti
+            namespace = None
+            if self._reverse_lookup and not code.co_flags & _CO_OPTIMIZED:
+                namespace = frame.f_locals
+        finally:
+            del frame
+        if self._origin:
+            self.origin = _Origin(code, lasti)
+        if self._lazy:
+            self._unpacking = (
+                self._unpacking[:2]  # type: ignore[index]
+                + (code, lasti, namespace))
+            if _stats is not None:
+                _stats.construction(code, lasti, None)
+            return
+
+        resolver = self._resolver
+        if resolver is not None:
+            resolution = resolver(code, lasti)
+            if (_verifier is not None and self._resolver_name is not None
+                    and _verifier.due()):
+                _verifier.check(code, lasti, resolution, self._resolver_name)
+
+        # Same than _resolve(), but inlined because this is the hot path.
+        else:
+            info = _code_infos.get(id(code))
+            if info is None:
+                info = _get_code_info(code)
+            cached = info.sites.get(lasti)
+            if cached is None:
+                resolution = info.sites[lasti] = _scan(info, lasti)
+            else:
+                resolution = cached
+                if _stats is not None:
+                    _stats.hits += 1
+                if _verifier is not None and _verifier.due():
+                    _verifier.check(code, lasti, resolution, "cache")
+        name, iterable_names = resolution
+
+        # The object is returned by a factory function.
+        if iterable_names is None and self._factory_depth:
+            resolution = _resolve_factory(self._factory_depth, code, lasti)
+            name, iterable_names = resolution
+        if _stats is not None:
+            _stats.construction(code, lasti, resolution)
+
+        # Here it will be stored the names needed
+        # for the iterable unpacking syntax.
+        if iterable_names:
+            args, kwargs = self._unpacking[:2]  # type: ignore[index]
+            self._unpacking = (args, kwargs, deque(iterable_names))
+        elif not self._keep_args:
+            self._unpacking = None
+
+        # Multiple and single assignment syntax
+        if name is not None:
+            self.name = name
+            if self._registry is not None:
+                self._registry.add(self)
+
+    # The '__iter__' method is defined to give compatibility
+    # with iterable unpacking syntax.
+    def __iter__(self: _T) -> Iterator[_T]:
+        if self._lazy:
+            self._resolve_lazy()
+        args, kwargs, iterable_names = self._unpacking  # type: ignore[misc]
+        names = iterable_names.popleft()
+        if _stats is not None:
+            _stats.fan_out[len(names)] += 1
 
+        # The unpacked objects were created at the same place.
+        return _create_named(
+            type(self), names, args, kwargs, origin=self.origin)
 
-class AutoName:
+    # Search the name of a lazy object. The name is stored, so that this
+    # method is not called again.
+    def _resolve_lazy(self) -> str:
+        state = getattr(self, "_unpacking", None)
+        if state is None or len(state) != 5:
+            return "<nameless>"
+        args, kwargs, code, lasti, namespace = state
+        name = None
+        if namespace is not None:
+            name = _search_namespace(self, namespace)
+        if name is None:
+            resolver = self._resolver
+            if resolver is None:
+                name, iterable_names = _resolve(code, lasti)
+            else:
+                name, iterable_names = resolution = resolver(code, lasti)
+                if (_verifier is not None and self._resolver_name is not None
+                        and _verifier.due()):
+                    _verifier.check(
+                        code, lasti, resolution, self._resolver_name)
+        else:
+            iterable_names = ()
+            if _verifier is not None and _verifier.due():
+                _verifier.check(code, lasti, (name, ()), "namespace")
+        if _stats is not None and name is None and not iterable_names:
+            _stats.nameless += 1
+        if iterable_names:
+            self._unpacking = (args, kwargs, deque(iterable_names))
+        elif self._keep_args:
+            self._unpacking = (args, kwargs)
+        else:
+            self._unpacking = None
+        if name is None:
+            self.name = name = "<nameless>"
+        else:
+            self.name = name
+            if self._registry is not None:
+                self._registry.add(self)
+        return name
+
+    # Only the name and the attributes of the subclasses are pickled and
+    # copied. The constructor is not called, so no frame is inspected.
+    def __reduce__(self) -> Tuple[Any, ...]:
+        state = self._state()
+        arguments = (type(self), _known_name(self))
+        if state is None:
+            return _restore, arguments
+        return _restore, arguments, state
+
+    def __copy__(self: _T) -> _T:
+        instance = _restore(type(self), _known_name(self))
+        _set_state(instance, self._state())
+        return instance
+
+    def __deepcopy__(self: _T, memo: Dict[int, Any]) -> _T:
+        instance = _restore(type(self), _known_name(self))
+        memo[id(self)] = instance
+        _set_state(instance, copy.deepcopy(self._state(), memo))
+        return instance
+
+    # The state of the subclasses, in the same format that pickle uses by
+    # default: the items of __dict__, or a tuple with them and the slots.
+    def _state(self) -> Any:
+        if self._custom_state:
+            return self.__getstate__()  # type: ignore[attr-defined]
+        dict_state = getattr(self, "__dict__", None)
+        if dict_state:
+            dict_state = dict_state.copy()
+            dict_state.pop("name", None)
+            dict_state.pop("_unpacking", None)
+            if self._origin:
+                dict_state.pop("origin", None)
+        dict_state = dict_state or None
+        if not self._state_slots:
+            return dict_state
+        slot_state = {}
+        for slot in self._state_slots:
+            value = getattr(self, slot, _MISSING)
+            if value is not _MISSING:
+                slot_state[slot] = value
+        if not slot_state:
+            return dict_state
+        return dict_state, slot_state
+
+    @classmethod
+    def named(cls: Type[_T], *args: Any, **kwargs: Any) -> _T:
+        """Create an object with the given name. It doesn't inspect any
+        frame. The other arguments are passed to the constructor.
+
+        >>> x = AutoName.named("y")
+        >>> x.name
+        'y'
+        """
+        # The name is positional-only, so that the constructor can take a
+        # 'name' keyword. The syntax is not available before python 3.8.
+        if not args:
+            raise TypeError(
+                "named() missing 1 required positional argument: 'name'")
+        return next(_create_named(cls, args[:1], args[1:], kwargs))
+
+    @classmethod
+    def from_names(cls: Type[_T], *args: Any, **kwargs: Any) -> List[_T]:
+        """Create one object for each given name. It doesn't inspect any
+        frame. The other arguments are passed to each constructor.
+
+        >>> [x.name for x in AutoName.from_names(["a", "b"])]
+        ['a', 'b']
+        """
+        # Same than named().
+        if not args:
+            raise TypeError(
+                "from_names() missing 1 required positional argument: "
+                "'names'")
+        return list(_create_named(cls, args[0], args[1:], kwargs))
+
+    @classmethod
+    def lookup(cls: Type[_T], name: str) -> _T:
+        """Return the oldest live object with the given name. Raise
+        KeyError if there is no one. The class must be created with
+        ``registry=True``.
+
+        >>> class Symbol(AutoName, registry=True):
+        ...     pass
+        >>> x = Symbol()
+        >>> Symbol.lookup("x") is x
+        True
+        """
+        registry = cls._registry or cls._get_registry()
+        refs = registry.objects.get(name)
+        if refs:
+
+            # The oldest one is almost always alive. Otherwise, its
+            # reference is removed soon. Other thread can change the
+            # dict meanwhile, then the slow path is taken.
+            try:
+                instance = next(iter(refs.values()))()
+            except (StopIteration, RuntimeError):
+                instance = None
+            if instance is not None:
+                return instance  # type: ignore[no-any-return]
+            for instance in registry.live(name):
+                return instance  # type: ignore[no-any-return]
+        raise KeyError(name)
+
+    @classmethod
+    def lookup_all(cls: Type[_T], name: str) -> List[_T]:
+        """Return all the live objects with the given name, from the oldest
+        to the newest.
+        """
+        return list(cls._get_registry().live(name))
+
+    @classmethod
+    def registered(cls: Type[_T]) -> Iterator[_T]:
+        "Iterate over all the live objects that have a name."
+        registry = cls._get_registry()
+        for name in list(registry.objects):
+            yield from registry.live(name)
+
+    @classmethod
+    def _get_registry(cls) -> _Registry:
+        if cls._registry is None:
+            raise TypeError(
+                f"{cls.__name__!r} has no registry, "
+                f"it must be created with registry=True")
+        return cls._registry
+
+    def __init_subclass__(
+        cls,
+        lazy: Optional[bool] = None,
+        registry: Optional[bool] = None,
+        origin: Optional[bool] = None,
+        factory_depth: Optional[int] = None,
+        reverse_lookup: Optional[bool] = None,
+        resolver: Optional[str] = None,
+    ) -> None:
+        if resolver is not None:
+            if resolver not in _resolvers:
+                raise ValueError(f"unknown resolver {resolver!r}")
+
+            # The functions are stored as static methods, so that they are
+            # not bound to the objects.
+            function = _resolvers[resolver]
+            cls._resolver = (  # type: ignore[assignment]
+                None if function is _resolve else staticmethod(function))
+            cls._resolver_name = (
+                None if function in (_resolve, _no_resolution) else resolver)
+        if reverse_lookup is not None:
+            cls._reverse_lookup = reverse_lookup
+        if lazy is not None:
+            cls._lazy = lazy
+        elif reverse_lookup:
+            cls._lazy = True
+        if cls._reverse_lookup and not cls._lazy:
+            raise TypeError(
+                f"{cls.__name__!r} objects must be lazy to search their "
+                f"name in the namespace")
+        if factory_depth is not None:
+            if factory_depth < 0:
+                raise ValueError("'factory_depth' must not be negative")
+            cls._factory_depth = factory_depth
+
+        # The frames of the factories are gone when the name of a lazy
+        # object is searched.
+        if cls._lazy and cls._factory_depth:
+            raise TypeError(
+                f"{cls.__name__!r} objects can't be lazy and search their "
+                f"name through factories")
+        if origin:
+            if not cls.__dictoffset__ and not any(
+                    isinstance(vars(base).get("origin"), MemberDescriptorType)
+                    for base in cls.__mro__):
+                raise TypeError(
+                    f"{cls.__name__!r} objects can't store their origin, "
+                    f"'origin' must be in __slots__")
+            cls._origin = True
+        elif origin is not None:
+            cls._origin = False
+        if registry:
+            if not cls.__weakrefoffset__:
+                raise TypeError(
+                    f"{cls.__name__!r} objects can't be registered, "
+                    f"'__weakref__' must be in __slots__")
+            cls._registry = _Registry()
+            if not getattr(cls.__setattr__, "_renaming", False):
+                cls.__setattr__ = (  # type: ignore[method-assign]
+                    _renaming_setattr(cls.__setattr__))
+        elif registry is not None:
+            cls._registry = None
+
+        # The call stack deepness increases each time that the user
+        # make a subclass of AutoName and override the __init__
+        # method. So, their frames are skipped.
+        cls._init_depths = _init_depths(cls)
+        cls._init_depth = 0
+        cls._init_code = None
+        mro = cls.__mro__
+        cls._plain_new = cls.__new__ is _AutoNameBase.__new__ and not any(
+            "__new__" in vars(t)
+            for t in mro[mro.index(_AutoNameBase) + 1:-1])
+        cls._init_overridden = (
+            cls.__init__ is not _AutoNameBase.__init__)  # type: ignore[misc]
+        cls._metaclass_call = (
+            type(cls).__call__ is not type.__call__)
+        cls._state_slots = _state_slots(cls)
+        cls._custom_state = any(
+            "__getstate__" in vars(t)
+            for t in mro if t is not object and t is not _AutoNameBase)
+        super().__init_subclass__()
+
+
+class AutoName(_AutoNameBase):
     """Stores the assigned name of an object.
 
     Single assignment:
@@ -80,139 +1263,777 @@ class AutoName:
     'a'
     >>> b.name
     'b'
+
+    With ``lazy=True`` a subclass only records where the object was
+    created. The name is searched the first time that it is read:
+    >>> class Symbol(AutoName, lazy=True):
+    ...     pass
+    >>> x = Symbol()
+    >>> x.name
+    'x'
     """
 
-    _deepness: int = 1
-    _args: Tuple[Any, ...]
-    _kwargs: Dict[str, Any]
-    name = "<nameless>"
+    name = _DefaultName()  # type: ignore[assignment]
 
-    def __new__(
-        cls,
-        *args: Tuple[Any, ...],
-        **kwargs: Dict[str, Any]
-    ) -> "AutoName":
-        new_obj: AutoName = super().__new__(cls)
-        new_obj._args = args
-        new_obj._kwargs = kwargs
-        return new_obj
 
-    def __init__(self) -> None:
-        frame = _get_frame(self._deepness)
-        if frame:
-            if frame.f_code.co_name == "__iter__":
-                return
+class SlottedAutoName(_AutoNameBase):
+    """Stores the assigned name of an object in a compact way.
+
+    It behaves like AutoName, but their instances have no ``__dict__``.
+    The constructor arguments are only kept when the object is used in
+    iterable unpacking syntax. Subclasses should define ``__slots__`` too.
+
+    >>> obj = SlottedAutoName()
+    >>> obj.name
+    'obj'
+    >>> a, b = SlottedAutoName()
+    >>> a.name
+    'a'
+    >>> b.name
+    'b'
+    """
+
+    __slots__ = ("name", "_unpacking")
+    _keep_args = False
+
+    # The name slot is empty if no name was found or if it was not
+    # searched yet.
+    def __getattr__(self, attr: str) -> Any:
+        if attr == "name":
+            return self._resolve_lazy()
+        if attr == "origin":
+            return None
+        raise AttributeError(
+            f"{type(self).__name__!r} object has no attribute {attr!r}")
+
+
+# The ids of the instances whose name was given by _create_named() while
+# their __init__ method is running. There is one for each thread that is
+# doing it, so that the instances of other threads are never mistaken
+# for them.
+_named_instances: Set[int] = set()
+
+
+# Create instances of 'cls' with already known names. It does the same
+# than 'cls(*args, **kwargs)' for each name, but AutoName.__init__ doesn't
+# inspect any frame. The user defined __init__ methods are still called.
+# The name is not set if it is None.
+def _create_named(
+    cls: Type[_T],
+    names: Iterable[Optional[str]],
+    args: Tuple[Any, ...],
+    kwargs: Dict[str, Any],
+    unpacking: Optional[Tuple[Any, ...]] = None,
+    origin: Optional[_Origin] = None,
+) -> Iterator[_T]:
+    plain_new = cls._plain_new
+    init_overridden = cls._init_overridden
+    registry = cls._registry
+    for name in names:
+        if plain_new:
+            instance = object.__new__(cls)
         else:
-            return
+            instance = cls.__new__(cls, *args, **kwargs)
+            if not isinstance(instance, cls):
+                yield instance
+                continue
+        if name is not None:
+            instance.name = name
+            if registry is not None:
+                registry.add(instance)
+        instance._unpacking = unpacking
+        if origin is not None:
+            instance.origin = origin
+        if init_overridden:
+            key = id(instance)
+            _named_instances.add(key)
+            try:
+                instance.__init__(*args, **kwargs)  # type: ignore[misc]
+            finally:
+                _named_instances.discard(key)
+        yield instance
 
-        # Here it will be stored the names needed
-        # for the iterable unpacking syntax.
-        self._iterable_names: Deque[List[str]] = deque()
 
-        # Python can create many names with iterable unpacking syntax and
-        # multiple assignment syntax. That is why it store them all.
-        multiple_names: List[str] = []
-        slices: List[Tuple[int, int]] = []
-        delta = 0
-        try:
-            STORED_NAMES = {
-                _STORE_NAME: frame.f_code.co_names,
-                _STORE_ATTR: frame.f_code.co_names,
-                _STORE_GLOBAL: frame.f_code.co_names,
-                _STORE_FAST: frame.f_code.co_varnames,
-                _STORE_DEREF: frame.f_code.co_cellvars,
-            }
-            VARNAME_FROM_OPARG = (
-                STORED_NAMES[_STORE_FAST] + STORED_NAMES[_STORE_DEREF])
-            bytecode = frame.f_code.co_code
-
-            # f_lasti indicates the position of the last bytecode instruction.
-            # In this case, it is the call to the class. So, it skip them and
-            # start in the next opcode. That one is two step ahead.
-            start = frame.f_lasti + 2
-            stop = len(bytecode)
-            extended_arg = 0
-
-            # Every Python instruction takes 2 bytes. The first byte represent
-            # the instruction, and the second byte is their argument. That is
-            # why the loop step is 2.
-            #
-            # The argument is also used to compute the index of name in the
-            # attribute co_* of frame.f_code.
-            for i in range(start, stop, 2):
-                instruction = bytecode[i]
-                if instruction == _UNPACK_SEQUENCE:
-
-                    # count is the amount of variables that want to unpack
-                    count = extended_arg | bytecode[i + 1]
-                    extended_arg = 0
-
-                    # Store slices because names that will
-                    # be used are not known at this point.
-                    begin = len(multiple_names)
-                    end = begin + count
-                    slice_ = (begin - delta, end - delta)
-                    slices.append(slice_)
-                    delta = end - begin
-                elif instruction == _EXTENDED_ARG:
-                    extended_arg |= bytecode[i + 1] << 8  # compute the index
-                elif instruction in STORED_NAMES:
-                    index = extended_arg | bytecode[i + 1]
-                    extended_arg = 0
-                    try:
-                        name = STORED_NAMES[instruction][index]
-
-                    # Following error happens on python 3.11
-                    except IndexError as error:
-                        if hasattr(frame.f_code, "_varname_from_oparg"):
-                            name = VARNAME_FROM_OPARG[index]
-                        else:
-                            raise error
-                    multiple_names.append(name)
-                elif multiple_names:
-                    if instruction not in _ALLOWED_INSTRUCTIONS:
-                        break
+# Pickle and copy
+# ===============
+
+
+_MISSING = object()
+
+
+# The name of an object, or None if it has no one. The name of a lazy
+# object is searched here.
+def _known_name(instance: _AutoNameBase) -> Optional[str]:
+    name = instance.name
+    return None if name == "<nameless>" else name
+
+
+# Create an object with the given name, without calling the constructor.
+# The constructor arguments are not kept.
+def _restore(cls: Type[_T], name: Optional[str]) -> _T:
+    if cls._plain_new:
+        instance = object.__new__(cls)
+    else:
+        instance = cls.__new__(cls)
+    if name is not None:
+        instance.name = name
+        if cls._registry is not None:
+            cls._registry.add(instance)
+    instance._unpacking = None
+    return instance
+
+
+def _set_state(instance: _AutoNameBase, state: Any) -> None:
+    if state is None:
+        return
+    setstate = getattr(instance, "__setstate__", None)
+    if setstate is not None:
+        setstate(state)
+        return
+    dict_state, slot_state = state if isinstance(state, tuple) else (
+        state, None)
+    if dict_state:
+        vars(instance).update(dict_state)
+    if slot_state:
+        for slot, value in slot_state.items():
+            setattr(instance, slot, value)
 
-            # Iterable unpacking syntax
-            if slices:
-                for begin, end in slices:
 
-                    # Store names that will be used in iterable unpacking
-                    names = multiple_names[begin:end]
-                    self._iterable_names.append(names)
+# The smallest array that can store the given indexes.
+def _index_array(indexes: List[int], count: int) -> "array[int]":
+    typecode = "B" if count <= 0xFF else "H" if count <= 0xFFFF else "L"
+    return array(typecode, indexes)
 
-                    # Remove unneeded names that will be
-                    # used in single or multiple assignment
-                    del multiple_names[begin:end]
 
-            # Multiple and single assignment syntax
-            if multiple_names:
+def pack_objects(
+    objects: Iterable[_AutoNameBase],
+    protocol: int = pickle.HIGHEST_PROTOCOL,
+) -> bytes:
+    """Pickle many objects in a compact way. Each class and each name is
+    stored only once. Only the name and the attributes of the subclasses
+    are stored, like pickle does with each object.
 
-                # [NOTE 1]: The correct name is the last one because
-                # that is how __set_name__ behaves in the same situation.
-                self.name = multiple_names[-1]
+    >>> x, y = AutoName()
+    >>> [obj.name for obj in unpack_objects(pack_objects([x, y, x]))]
+    ['x', 'y', 'x']
+    """
+    classes: Dict[type, int] = {}
+    names: Dict[Optional[str], int] = {}
+    class_indexes: List[int] = []
+    name_indexes: List[int] = []
+    states: Dict[int, Any] = {}
+    for position, instance in enumerate(objects):
+        cls = type(instance)
+        index = classes.get(cls)
+        if index is None:
+            index = classes[cls] = len(classes)
+        class_indexes.append(index)
+        name = _known_name(instance)
+        index = names.get(name)
+        if index is None:
+            index = names[name] = len(names)
+        name_indexes.append(index)
+        state = instance._state()
+        if state is not None:
+            states[position] = state
+    return pickle.dumps((
+        tuple(classes), tuple(names),
+        _index_array(class_indexes, len(classes)),
+        _index_array(name_indexes, len(names)),
+        states,
+    ), protocol)
+
+
+def unpack_objects(data: bytes) -> List[Any]:
+    """Return the objects pickled by pack_objects(). Like pickle, it must
+    only be used with trusted data.
+    """
+    classes, names, class_indexes, name_indexes, states = pickle.loads(data)
+
+    # Same than _restore(), but inlined because it is called many times.
+    objects: List[Any] = []
+    append = objects.append
+    new = object.__new__
+    for class_index, name_index in zip(class_indexes, name_indexes):
+        cls = classes[class_index]
+        instance = new(cls) if cls._plain_new else cls.__new__(cls)
+        name = names[name_index]
+        if name is not None:
+            instance.name = name
+            if cls._registry is not None:
+                cls._registry.add(instance)
+        instance._unpacking = None
+        append(instance)
+    for position, state in states.items():
+        _set_state(objects[position], state)
+    return objects
+
+
+# Import hook
+# ===========
+
+
+def install_import_hook(packages: Iterable[str]) -> Any:
+    """Rewrite the modules of the given packages when they are imported,
+    so that the names of the objects are known at import time and no
+    frame is inspected. E.g. 'x = Symbol()' is compiled as if it were
+    'x = Symbol.named("x")'. The modules imported before are not
+    rewritten.
+
+    Only the assignments to a call of a capitalized name are rewritten.
+    The objects created in other ways, e.g. in a for loop, still get
+    their names from the bytecode. Return the hook, that can be passed
+    to uninstall_import_hook().
+    """
+    from . import _hook
+    return _hook.install(packages)
+
+
+def uninstall_import_hook(hook: Any = None) -> None:
+    """Stop to rewrite the imported modules. If 'hook' is not given, all
+    the hooks are uninstalled.
+    """
+    from . import _hook
+    _hook.uninstall(hook)
+
+
+# The rewritten modules call '_call_named(callee, resolution)(*args,
+# **kwargs)' instead of 'callee(*args, **kwargs)'. The names are the same
+# than the ones found by _scan(). Any other callee is returned as is, so
+# that it is called from the frame of the module. The subclasses whose
+# metaclass overrides __call__ are returned too, so that it is called.
+def _call_named(callee: Any, resolution: _Resolution) -> Any:
+    if not (isinstance(callee, type) and issubclass(callee, _AutoNameBase)
+            ) or callee._metaclass_call:
+        return callee
+    return functools.partial(_create_hooked, callee, resolution)
+
+
+# Create the object of a rewritten assignment. The arguments are taken
+# from 'args', so that they never clash with the keyword arguments of
+# the callee. The caller is the frame of the module, because
+# functools.partial() has no frame.
+def _create_hooked(*args: Any, **kwargs: Any) -> Any:
+    callee, resolution = args[:2]
+    args = args[2:]
+    if _verifier is not None and _verifier.due():
+        frame = sys._getframe(1)
+        try:
+            _verifier.check(
+                frame.f_code, frame.f_lasti, resolution, "import_hook")
         finally:
             del frame
+    name, iterable_names = resolution
+    unpacking: Optional[Tuple[Any, ...]]
+    if iterable_names:
+        unpacking = (args, kwargs, deque(iterable_names))
+    elif callee._keep_args:
+        unpacking = (args, kwargs)
+    else:
+        unpacking = None
+    origin = None
+    if callee._origin:
+        frame = sys._getframe(1)
+        origin = _Origin(frame.f_code, frame.f_lasti)
+        del frame
 
-    # The '__iter__' method is defined to give compatibility
-    # with iterable unpacking syntax.
-    def __iter__(self: _T) -> Iterator[_T]:
-        for name in self._iterable_names.popleft():
-            instance = type(self)(*self._args, **self._kwargs)
+    # Same than _create_named(), but inlined for the classes that don't
+    # override __new__ and __init__, because this is the hot path.
+    if callee._plain_new and not callee._init_overridden:
+        instance = object.__new__(callee)
+        if name is not None:
             instance.name = name
-            yield instance
+            if callee._registry is not None:
+                callee._registry.add(instance)
+        instance._unpacking = unpacking
+        if origin is not None:
+            instance.origin = origin
+        return instance
+    return next(
+        _create_named(callee, (name,), args, kwargs, unpacking, origin))
 
-    def __init_subclass__(cls) -> None:
 
-        # The call stack deepness increases each time that the user
-        # make a subclass of AutoName and override the __init__
-        # method. So, it count how many times __init__ was overrided.
-        cls._deepness = len({
-            t.__init__  # type: ignore[misc]
-            for t in cls.__mro__
-            if AutoName in t.__mro__
-        })
-        super().__init_subclass__()
+# Pre-warming
+# ===========
+
+
+# The offset of these instructions is the 'lasti' of the frame where an
+# object is created.
+_CALL_INSTRUCTIONS = bytes(
+    opcode.opmap[opname]
+    for opname in (
+        "CALL", "CALL_FUNCTION", "CALL_FUNCTION_KW", "CALL_FUNCTION_EX",
+        "CALL_METHOD", "CALL_KW",
+    )
+    if opname in opcode.opmap
+)
+
+
+# The names of AutoName, SlottedAutoName and all their subclasses.
+def _class_names() -> Set[str]:
+    names = set()
+    classes = [_AutoNameBase]
+    while classes:
+        cls = classes.pop()
+        names.add(cls.__name__)
+        classes.extend(cls.__subclasses__())
+    names.discard(_AutoNameBase.__name__)
+    return names
+
+
+# The code objects of the functions and classes defined in the given
+# modules, and the ones nested inside them, like lambdas, comprehensions
+# and inner functions. The top level code of the modules is not kept
+# after the import, but it was already executed anyway.
+def _code_objects(modules: Dict[str, Any]) -> Iterator[CodeType]:
+    seen = set()
+    objects: List[Any] = []
+    for module in modules.values():
+        objects.extend(vars(module).values())
+    codes: List[CodeType] = []
+    while objects:
+        obj = objects.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, (staticmethod, classmethod)):
+            objects.append(obj.__func__)
+        elif isinstance(obj, property):
+            objects.extend((obj.fget, obj.fset, obj.fdel))
+        elif getattr(obj, "__module__", None) not in modules:
+            continue
+        elif isinstance(obj, type):
+            objects.extend(vars(obj).values())
+        elif isinstance(getattr(obj, "__code__", None), CodeType):
+            codes.append(obj.__code__)
+            objects.append(getattr(obj, "__wrapped__", None))
+    while codes:
+        code = codes.pop()
+        if id(code) in seen:
+            continue
+        seen.add(id(code))
+        yield code
+        codes.extend(c for c in code.co_consts if isinstance(c, CodeType))
+
+
+def warm(module: Any) -> int:
+    """Search the names of the objects created in the given module
+    before they are created, so that no bytecode is scanned later. If it
+    is a package, the submodules already imported are warmed too. Only
+    the functions and classes of the module are searched, and only the
+    ones that refer to AutoName or to a subclass by their name.
+
+    It is useful before forking worker processes, so that all of them
+    share the same data. Call 'gc.freeze()' after 'warm()' to keep
+    that data out of the garbage collector. Return the amount of call
+    sites resolved.
+    """
+    modules = {module.__name__: module}
+    if hasattr(module, "__path__"):
+        prefix = module.__name__ + "."
+        for name, submodule in list(sys.modules.items()):
+            if name.startswith(prefix) and submodule is not None:
+                modules[name] = submodule
+    class_names = _class_names()
+    resolved = 0
+    for code in _code_objects(modules):
+        if class_names.isdisjoint(code.co_names):
+            continue
+        info = _get_code_info(code)
+        if info.kinds is None:
+            info.prepare(code)
+        kinds: bytes = info.kinds  # type: ignore[assignment]
+        steps = info.steps
+        instructions = code.co_code[::2]
+        index = 0
+        while index < len(kinds):
+            if instructions[index] in _CALL_INSTRUCTIONS:
+                lasti = 2 * index
+                if lasti not in info.sites:
+                    info.sites[lasti] = _scan(info, lasti)
+                    resolved += 1
+            index += steps[index]
+    return resolved
+
+
+# Disk cache
+# ==========
+
+
+def enable_disk_cache() -> None:
+    """Keep the names found in each source file in a file next to their
+    bytecode, in the __pycache__ directory, so that other processes don't
+    search them again. They are written when Python exits. The file is
+    ignored when the source file changes.
+
+    Only the code that runs for the first time after this call uses the
+    cache, so it should be called before importing the modules.
+    """
+    global _disk_cache
+    if _disk_cache is None:
+        from . import _disk
+        _disk_cache = _disk.DiskCache()
+        atexit.register(_flush_at_exit)
+
+
+def disable_disk_cache() -> None:
+    "Write the names found and stop to use the disk cache."
+    global _disk_cache
+    if _disk_cache is not None:
+        _disk_cache.flush()
+        _disk_cache.close()
+        _disk_cache = None
+    atexit.unregister(_flush_at_exit)
+
+
+def flush_disk_cache() -> None:
+    """Write the names found since the last time. It is useful in worker
+    processes that don't exit in the usual way, e.g. the ones of
+    multiprocessing.
+    """
+    if _disk_cache is not None:
+        _disk_cache.flush()
+
+
+# The disk cache is only an optimization. So, if it can't be written when
+# Python exits, the names are searched again by the next process instead
+# of printing a traceback.
+def _flush_at_exit() -> None:
+    try:
+        flush_disk_cache()
+    except Exception:
+        pass
+
+
+# Runtime statistics
+# ==================
+
+
+# Return the line of the instruction at the 'lasti' offset.
+def _line_number(code: CodeType, lasti: int) -> Optional[int]:
+    if hasattr(code, "co_lines"):
+        for start, end, line in code.co_lines():
+            if start <= lasti < end:
+                return line  # type: ignore[no-any-return]
+        return None
+    line = None
+    for offset, line_start in dis.findlinestarts(code):
+        if offset > lasti:
+            break
+        line = line_start
+    return line
+
+
+def _location(code: CodeType, lasti: int) -> str:
+    qualname = getattr(code, "co_qualname", code.co_name)
+    line = _line_number(code, lasti)
+    return f"{code.co_filename}:{line} ({qualname})"
+
+
+class _Stats:
+    "Counters updated by AutoName while the statistics are enabled."
+
+    __slots__ = ("sites", "locations", "nameless", "fan_out", "scanned",
+                 "hits", "misses", "evictions")
+
+    def __init__(self) -> None:
+
+        # The code objects are not stored, so that they can be destroyed.
+        # The location of each call site is computed only once.
+        self.sites: Counter[str] = Counter()
+        self.locations: Dict[Tuple[int, int], str] = {}
+        self.nameless = 0
+        self.fan_out: Counter[int] = Counter()
+        self.scanned = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def construction(
+        self,
+        code: CodeType,
+        lasti: int,
+        resolution: Optional[_Resolution],
+    ) -> None:
+        location = self.locations.get((id(code), lasti))
+        if location is None:
+            location = self.locations[id(code), lasti] = (
+                _location(code, lasti))
+        self.sites[location] += 1
+        if resolution is not None:
+            name, iterable_names = resolution
+            if name is None and not iterable_names:
+                self.nameless += 1
+
+    # The id of a destroyed code object can be used by another one.
+    def evict(self, key: int) -> None:
+        self.evictions += 1
+        for site in [site for site in self.locations if site[0] == key]:
+            del self.locations[site]
+
+
+# It is None while the statistics are disabled. So, the only overhead is
+# to check that.
+_stats: Optional[_Stats] = None
+
+
+def enable_stats(report_at_exit: bool = False) -> None:
+    """Start to count what AutoName does. The counters are kept if the
+    statistics were already enabled. If 'report_at_exit' is true, the
+    report of format_stats() is printed to stderr when Python exits.
+
+    The counters are not locked, so they are approximated if objects are
+    created in many threads at the same time.
+    """
+    global _stats
+    if _stats is None:
+        _stats = _Stats()
+    if report_at_exit:
+        atexit.register(_report_at_exit)
+
+
+def disable_stats() -> None:
+    "Stop to count and forget the counters."
+    global _stats
+    _stats = None
+    atexit.unregister(_report_at_exit)
+
+
+def stats(limit: Optional[int] = None) -> Dict[str, Any]:
+    """Return the counters as a dictionary. 'call_sites' has the location
+    and the amount of constructions of the 'limit' hottest call sites.
+    """
+    current = _stats or _Stats()
+    return {
+        "constructions": sum(current.sites.values()),
+        "call_sites": current.sites.most_common(limit),
+        "nameless": current.nameless,
+        "resolutions": current.misses,
+        "instructions_scanned": current.scanned,
+        "unpack_fan_out": dict(current.fan_out),
+        "cache_hits": current.hits,
+        "cache_misses": current.misses,
+        "cache_evictions": current.evictions,
+    }
+
+
+def format_stats(limit: int = 10) -> str:
+    "Return a report of the statistics with the hottest call sites."
+    data = stats(limit)
+    resolutions = data["resolutions"]
+    mean = data["instructions_scanned"] / resolutions if resolutions else 0
+    lines = [
+        f"objname: {data['constructions']} constructions, "
+        f"{data['nameless']} nameless",
+        f"  {resolutions} resolutions, "
+        f"{mean:.1f} instructions scanned per resolution",
+        f"  cache: {data['cache_hits']} hits, {data['cache_misses']} "
+        f"misses, {data['cache_evictions']} evictions",
+    ]
+    if data["unpack_fan_out"]:
+        fan_out = ", ".join(
+            f"{targets} targets x {count}"
+            for targets, count in sorted(data["unpack_fan_out"].items()))
+        lines.append(f"  unpack fan-out: {fan_out}")
+    if data["call_sites"]:
+        lines.append("  hottest call sites:")
+        lines.extend(
+            f"    {count:>10} {location}"
+            for location, count in data["call_sites"])
+    return "\n".join(lines)
+
+
+def _report_at_exit() -> None:
+    if _stats is not None:
+        print(format_stats(), file=sys.stderr)
+
+
+# Verification
+# ============
+
+
+# A plain scan of the instructions given by the dis module, used by
+# verify() as the reference. It shares the rules of _scan(), that are the
+# sets of allowed and stop instructions, but nothing of the way that the
+# bytecode is decoded and scanned. Each iterable unpacking takes the next
+# stores until it has all their names.
+def _reference_scan(code: CodeType, lasti: int) -> _Resolution:
+    instructions = list(dis.get_instructions(code))
+    offsets = {
+        instruction.offset: index
+        for index, instruction in enumerate(instructions)}
+
+    # Since python 3.11 the callers of functions can be at the last inline
+    # cache of the call. So, the call is the last instruction before it.
+    index = 0
+    while (index + 1 < len(instructions)
+           and instructions[index + 1].offset <= lasti):
+        index += 1
+    if instructions[index].opname == "SEND":
+        index = offsets[instructions[index].argval]
+    else:
+        index += 1
+    names: List[str] = []
+    unpackings: List[Tuple[int, List[str]]] = []
+    stored = False
+    copied = False
+    while index < len(instructions):
+        instruction = instructions[index]
+        opname = instruction.opname
+        index += 1
+
+        # The copy of the object made by 'A() or default' is tested by a
+        # conditional jump, that carries the object to the store.
+        if not stored and copied and opname in (
+                "POP_JUMP_IF_TRUE", "POP_JUMP_IF_FALSE"):
+            index = offsets[instruction.argval]
+            copied = False
+            continue
+        if opname != "TO_BOOL":
+            copied = opname == "DUP_TOP" or (
+                opname == "COPY" and instruction.arg == 1)
+        if opname in ("STORE_NAME", "STORE_ATTR", "STORE_GLOBAL",
+                      "STORE_FAST", "STORE_DEREF", "STORE_FAST_STORE_FAST",
+                      "STORE_FAST_LOAD_FAST"):
+            stored = True
+            if opname == "STORE_FAST_STORE_FAST":
+                targets = list(instruction.argval)
+            elif opname == "STORE_FAST_LOAD_FAST":
+                targets = [instruction.argval[0]]
+            else:
+                targets = [instruction.argval]
+            for target in targets:
+                for size, unpacked in reversed(unpackings):
+                    if len(unpacked) < size:
+                        unpacked.append(target)
+                        break
+                else:
+                    names.append(target)
+            if opname == "STORE_FAST_LOAD_FAST":
+                break
+        elif opname == "UNPACK_SEQUENCE":
+            unpackings.append((instruction.argval, []))
+        elif stored:
+            if instruction.opcode not in _ALLOWED_INSTRUCTIONS:
+                break
+        elif instruction.opcode in _STOP_INSTRUCTIONS:
+            break
+        elif opname == "RETURN_VALUE":
+            return None, None
+        elif opname == "JUMP_FORWARD":
+            index = offsets[instruction.argval]
+    name = names[-1] if names else None
+    return name, tuple(tuple(unpacked) for _, unpacked in unpackings)
+
+
+class _Verifier:
+    """Compare a sample of the names found by the fast paths with the ones
+    found by a full scan of the bytecode. The fast paths are the call site
+    cache, that is also filled by warm() and the disk cache, the names
+    given by the import hook, the names found in the namespace by
+    _search_namespace(), the selected resolvers and _resolve_factory().
+    """
+
+    __slots__ = ("rate", "countdown", "checks", "seconds", "mismatches")
+
+    def __init__(self, rate: float) -> None:
+        self.rate = rate
+        self.countdown = self._interval()
+        self.checks = 0
+        self.seconds = 0.0
+
+        # The mismatches of each call site and fast path. So, a call site
+        # that is always wrong is stored only once.
+        self.mismatches: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    # The amount of constructions until the next check. It follows a
+    # geometric distribution, so that the checks are not synchronized
+    # with loops.
+    def _interval(self) -> int:
+        if self.rate >= 1:
+            return 1
+        return 1 + int(
+            math.log(1.0 - random.random()) / math.log(1.0 - self.rate))
+
+    def due(self) -> bool:
+        self.countdown -= 1
+        if self.countdown > 0:
+            return False
+        self.countdown = self._interval()
+        return True
+
+    # The code is scanned again by _reference_scan(), so that nothing
+    # computed by the fast paths and by _scan() is used.
+    def check(
+        self,
+        code: CodeType,
+        lasti: int,
+        found: _Resolution,
+        path: str,
+    ) -> None:
+        start = time.perf_counter()
+        expected = _reference_scan(code, lasti)
+        self.checks += 1
+        if expected != found:
+            location = _location(code, lasti)
+            mismatch = self.mismatches.get((location, path))
+            if mismatch is None:
+                mismatch = self.mismatches[location, path] = {
+                    "location": location,
+                    "lasti": lasti,
+                    "path": path,
+                    "expected": expected,
+                    "found": found,
+                    "count": 0,
+                }
+            mismatch["count"] += 1
+        self.seconds += time.perf_counter() - start
+
+
+# It is None while the verification is disabled.
+_verifier: Optional[_Verifier] = None
+
+
+def verify(rate: float = 0.001) -> None:
+    """Check the names found without a full scan of the bytecode in the
+    given fraction of the constructions. Those names come from the call
+    site cache, the import hook, the namespace of reverse_lookup=True, the
+    resolver of the class or the callers of factory functions. The
+    results are returned by verification(). A rate of 0 stops the
+    verification and forgets the results. The results are kept if only
+    the rate is changed.
+
+    As the statistics, the counters are approximated if objects are
+    created in many threads at the same time.
+    """
+    global _verifier
+    if not 0 <= rate <= 1:
+        raise ValueError(f"rate must be between 0 and 1, not {rate!r}")
+    if rate == 0:
+        _verifier = None
+    elif _verifier is None:
+        _verifier = _Verifier(rate)
+    else:
+        _verifier.rate = rate
+        _verifier.countdown = _verifier._interval()
+
+
+def verification() -> Dict[str, Any]:
+    """Return the results of verify() as a dictionary. 'seconds' is the
+    time spent in the checks. Each item of 'mismatches' has the location
+    of a call site, the fast path that was checked, the names 'expected'
+    by the full scan, the names 'found' by the fast path and how many
+    times they were different.
+    """
+    if _verifier is None:
+        return {"rate": 0.0, "checks": 0, "seconds": 0.0, "mismatches": []}
+    return {
+        "rate": _verifier.rate,
+        "checks": _verifier.checks,
+        "seconds": _verifier.seconds,
+        "mismatches": [
+            dict(mismatch) for mismatch in _verifier.mismatches.values()],
+    }
 
 
 if __name__ == "__main__":
@@ -0,0 +1,234 @@
+"""Resolutions of the call sites persisted on disk.
+
+There is one file for each source file, next to their bytecode:
+'__pycache__/<module>.<cache tag>.objname'. Its layout is:
+
+    header   magic, amount of records, mtime and size of the source
+    keys     the sorted key of each code object, 8 bytes each one
+    ends     the offset where each record ends, 8 bytes each one
+    records  the resolutions of each code object, as a marshalled dict
+
+The file is memory-mapped. The keys are searched with bisect directly in
+the mapped memory, so that only the record of each code object that is
+actually run is unmarshalled. The file is ignored if the mtime or the
+size of the source are not the same than the header says.
+"""
+
+from array import array
+from importlib.util import MAGIC_NUMBER, cache_from_source
+from types import CodeType
+from typing import Any, Dict, List, Optional, Tuple
+import bisect
+import hashlib
+import marshal
+import mmap
+import os
+import struct
+import threading
+
+
+_MAGIC = b"ONC\x02"
+_HEADER = struct.Struct("=4sIqq")
+
+
+# The same code object, compiled by the same version of python, always
+# gives the same resolutions. The names are part of the key because the
+# bytecode only has their indices.
+def code_key(code: CodeType) -> int:
+    qualname = getattr(code, "co_qualname", code.co_name)
+    names = repr((
+        qualname, code.co_firstlineno, code.co_names, code.co_varnames,
+        code.co_cellvars, code.co_freevars))
+    digest = hashlib.blake2b(
+        MAGIC_NUMBER + code.co_code + names.encode(), digest_size=8)
+    return int.from_bytes(digest.digest(), "little")
+
+
+class _File:
+    "The mapped file of a source file."
+
+    __slots__ = ("memory", "keys", "ends", "start")
+
+    def __init__(self, memory: mmap.mmap, count: int) -> None:
+        view = memoryview(memory)
+        start = _HEADER.size + 16 * count
+        self.memory = memory
+        self.keys = view[_HEADER.size:_HEADER.size + 8 * count].cast("Q")
+        self.ends = view[_HEADER.size + 8 * count:start].cast("Q")
+        self.start = start
+        view.release()
+
+    def find(self, key: int) -> Optional[bytes]:
+        index = bisect.bisect_left(self.keys, key)
+        if index == len(self.keys) or self.keys[index] != key:
+            return None
+        begin = self.ends[index - 1] if index else self.start
+        return self.memory[begin:self.ends[index]]
+
+    def records(self) -> Dict[int, bytes]:
+        records = {}
+        begin = self.start
+        for key, end in zip(self.keys, self.ends):
+            records[key] = self.memory[begin:end]
+            begin = end
+        return records
+
+    def close(self) -> None:
+        self.keys.release()
+        self.ends.release()
+        self.memory.close()
+
+
+def _stat(source: str) -> Optional[Tuple[int, int]]:
+    try:
+        result = os.stat(source)
+    except OSError:
+        return None
+    return result.st_mtime_ns, result.st_size
+
+
+def _cache_path(source: str) -> Optional[str]:
+    try:
+        return cache_from_source(source)[:-len(".pyc")] + ".objname"
+    except (NotImplementedError, ValueError):
+        return None
+
+
+def _open(source: str) -> Optional[_File]:
+    path = _cache_path(source)
+    if path is None:
+        return None
+    try:
+        with open(path, "rb") as file:
+            memory = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+    if len(memory) >= _HEADER.size:
+        magic, count, mtime, size = _HEADER.unpack_from(memory)
+        if magic == _MAGIC and (mtime, size) == _stat(source):
+            return _File(memory, count)
+    memory.close()
+    return None
+
+
+# How many times a dict is copied until other threads don't change it
+# during the copy. The last attempt is not retried.
+_SNAPSHOT_ATTEMPTS = 8
+
+
+# Copy a dict that other threads can change meanwhile.
+def _snapshot(mapping: Dict[Any, Any]) -> Dict[Any, Any]:
+    for _ in range(_SNAPSHOT_ATTEMPTS - 1):
+        try:
+            return dict(mapping)
+
+        # Other thread changed the dict meanwhile.
+        except RuntimeError:
+            continue
+    return dict(mapping)
+
+
+# Write the file atomically. Other processes either see the old file or
+# the new one.
+def _write(source: str, records: Dict[int, bytes]) -> None:
+    path = _cache_path(source)
+    stat = _stat(source)
+    if path is None or stat is None:
+        return
+    keys = sorted(records)
+    ends: List[int] = []
+    end = _HEADER.size + 16 * len(keys)
+    for key in keys:
+        end += len(records[key])
+        ends.append(end)
+    temporary = f"{path}.{os.getpid()}"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(temporary, "wb") as file:
+            file.write(_HEADER.pack(_MAGIC, len(keys), *stat))
+            file.write(array("Q", keys).tobytes())
+            file.write(array("Q", ends).tobytes())
+            for key in keys:
+                file.write(records[key])
+        os.replace(temporary, path)
+    except OSError:
+        try:
+            os.remove(temporary)
+        except OSError:
+            pass
+
+
+class DiskCache:
+    """The files of the source files whose code was run. The resolutions
+    of each code object are loaded the first time that it is run. The
+    ones found later are written by flush().
+
+    The files are opened, read, replaced and closed with a lock, because
+    flush() closes the mapped file that other thread can be reading.
+    """
+
+    def __init__(self) -> None:
+        self.files: Dict[str, Optional[_File]] = {}
+        self.lock = threading.Lock()
+
+        # The resolutions of each code object of each source file, and
+        # how many of them were loaded from the file. They are the same
+        # dicts that objname uses, so the new ones are already there. It
+        # is None if the code was not compiled from a file, e.g. exec().
+        self.sites: Dict[
+            str, Optional[Dict[int, Tuple[Dict[int, Any], int]]]] = {}
+
+    def load(self, code: CodeType, sites: Dict[int, Any]) -> None:
+        source = code.co_filename
+        key = code_key(code)
+        record = None
+        with self.lock:
+            if source not in self.sites:
+                self.files[source] = _open(source)
+                self.sites[source] = (
+                    {} if os.path.isfile(source) else None)
+            code_sites = self.sites[source]
+            if code_sites is None:
+                return
+            file = self.files[source]
+            if file is not None:
+                record = file.find(key)
+        if record is not None:
+            sites.update(marshal.loads(record))
+        code_sites[key] = (sites, len(sites))
+
+    def flush(self) -> None:
+        """Write the files whose code found new resolutions. Other threads
+        can keep creating objects meanwhile, so the dicts are copied
+        first, and only what was copied is marked as written.
+        """
+        for source, code_sites in _snapshot(self.sites).items():
+            if code_sites is None:
+                continue
+            copies = {
+                key: (sites, _snapshot(sites))
+                for key, (sites, loaded) in _snapshot(code_sites).items()
+                if len(sites) != loaded}
+            if not copies:
+                continue
+
+            # The records of the code that found nothing new are kept.
+            with self.lock:
+                file = self.files[source]
+                records = {} if file is None else file.records()
+                for key, (_, copy) in copies.items():
+                    records[key] = marshal.dumps(copy)
+                if file is not None:
+                    file.close()
+                _write(source, records)
+                self.files[source] = _open(source)
+            for key, (sites, copy) in copies.items():
+                code_sites[key] = (sites, len(copy))
+
+    def close(self) -> None:
+        with self.lock:
+            for file in self.files.values():
+                if file is not None:
+                    file.close()
+            self.files.clear()
+            self.sites.clear()
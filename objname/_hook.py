@@ -0,0 +1,184 @@
+"""Import hook that gives the names to AutoName at import time.
+
+The assignments whose value is a call are rewritten, so that the names
+of the targets are passed as constants:
+
+    x = Symbol(1)
+
+is compiled as:
+
+    x = _objname_call_named(Symbol, ("x", ()))(1)
+
+_objname_call_named() is objname._call_named(). If the callee is a
+subclass of AutoName, it returns a function that creates the object
+with the given name, so that no frame is inspected. Otherwise, it
+returns the callee, that is called from the frame of the module as
+usual. So, callables that inspect the frame of their caller, e.g.
+TypeVar() or Enum(), still see the module.
+"""
+
+from importlib.abc import MetaPathFinder
+from importlib.machinery import ModuleSpec, PathFinder, SourceFileLoader
+from types import CodeType, ModuleType
+from typing import Iterable, List, Optional, Sequence, Tuple, Union
+import ast
+import sys
+
+
+# The name of objname._call_named() in the rewritten modules. It has only
+# one leading underscore, so that it is not mangled in class bodies.
+_HELPER = "_objname_call_named"
+
+
+_Resolution = Tuple[Optional[str], Tuple[Tuple[str, ...], ...]]
+
+
+# Mangled names are stored with the name of the class as prefix.
+def _plain(name: str) -> bool:
+    return not name.startswith("__") or name.endswith("__")
+
+
+def _target_name(target: ast.expr) -> Optional[str]:
+    if isinstance(target, ast.Name) and _plain(target.id):
+        return target.id
+    if isinstance(target, ast.Attribute) and _plain(target.attr):
+        return target.attr
+    return None
+
+
+# Return the same names that objname._scan() finds in the bytecode of
+# the assignment. It returns None for the targets that are not
+# supported, e.g. subscriptions, starred or nested targets. Those
+# objects still get their names from the bytecode.
+def _resolution(targets: Sequence[ast.expr]) -> Optional[_Resolution]:
+    name = None
+    iterable_names: List[Tuple[str, ...]] = []
+    for target in targets:
+        if isinstance(target, (ast.Tuple, ast.List)):
+            names = tuple(_target_name(item) for item in target.elts)
+            if None in names:
+                return None
+            iterable_names.append(names)  # type: ignore[arg-type]
+        else:
+            name = _target_name(target)
+            if name is None:
+                return None
+    return name, tuple(iterable_names)
+
+
+# By convention, only the classes have capitalized names. Other
+# callables are not rewritten, so that they don't pay the cost of
+# _call_named(). It also keeps the frame of calls like super() and
+# locals().
+def _maybe_class(call: ast.Call) -> bool:
+    if isinstance(call.func, ast.Name):
+        name = call.func.id
+    elif isinstance(call.func, ast.Attribute):
+        name = call.func.attr
+    else:
+        return False
+    return name[:1].isupper()
+
+
+class _Transformer(ast.NodeTransformer):
+    def _rewrite(
+        self,
+        node: Union[ast.Assign, ast.AnnAssign],
+        targets: Sequence[ast.expr],
+    ) -> ast.AST:
+        self.generic_visit(node)
+        call = node.value
+        if not isinstance(call, ast.Call) or not _maybe_class(call):
+            return node
+        resolution = _resolution(targets)
+        if resolution is None:
+            return node
+        # The compiler accepts a tuple of constants as a constant, but
+        # the stubs of ast don't.
+        constant = ast.Constant(value=resolution)  # type: ignore[arg-type]
+        helper = ast.Call(
+            func=ast.Name(id=_HELPER, ctx=ast.Load()),
+            args=[call.func, constant],
+            keywords=[],
+        )
+        node.value = ast.copy_location(ast.Call(
+            func=helper, args=call.args, keywords=call.keywords), call)
+        return node
+
+    def visit_Assign(self, node: ast.Assign) -> ast.AST:
+        return self._rewrite(node, node.targets)
+
+    def visit_AnnAssign(self, node: ast.AnnAssign) -> ast.AST:
+        return self._rewrite(node, [node.target])
+
+
+# The helper is imported after the docstring and the __future__ imports.
+def rewrite(tree: ast.Module) -> ast.Module:
+    "Rewrite the assignments of the module and import the helper."
+    has_docstring = ast.get_docstring(tree, clean=False) is not None
+    tree = _Transformer().visit(tree)
+    position = 0
+    for position, statement in enumerate(tree.body):
+        is_docstring = position == 0 and has_docstring
+        is_future = (
+            isinstance(statement, ast.ImportFrom)
+            and statement.module == "__future__")
+        if not is_docstring and not is_future:
+            break
+    else:
+        position = len(tree.body)
+    tree.body.insert(position, ast.ImportFrom(
+        module="objname",
+        names=[ast.alias(name="_call_named", asname=_HELPER)],
+        level=0))
+    return ast.fix_missing_locations(tree)
+
+
+class _Loader(SourceFileLoader):
+    """Compile the rewritten source. The bytecode is not cached, so that
+    the rewritten code is never used when the hook is not installed.
+    """
+
+    def get_code(self, fullname: str) -> CodeType:
+        path = self.get_filename(fullname)
+        tree = ast.parse(self.get_data(path), path)
+        return compile(  # type: ignore[no-any-return]
+            rewrite(tree), path, "exec", dont_inherit=True)
+
+
+class Finder(MetaPathFinder):
+    "Find the modules of the given packages and rewrite them."
+
+    def __init__(self, packages: Iterable[str]) -> None:
+        self.packages = tuple(packages)
+
+    def _matches(self, fullname: str) -> bool:
+        return any(
+            fullname == package or fullname.startswith(package + ".")
+            for package in self.packages)
+
+    def find_spec(
+        self,
+        fullname: str,
+        path: Optional[Sequence[str]],
+        target: Optional[ModuleType] = None,
+    ) -> Optional[ModuleSpec]:
+        if not self._matches(fullname):
+            return None
+        spec = PathFinder.find_spec(fullname, path)
+        if spec is None or type(spec.loader) is not SourceFileLoader:
+            return spec
+        spec.loader = _Loader(spec.loader.name, spec.loader.path)
+        return spec
+
+
+def install(packages: Iterable[str]) -> Finder:
+    finder = Finder(packages)
+    sys.meta_path.insert(0, finder)
+    return finder
+
+
+def uninstall(finder: Optional[Finder] = None) -> None:
+    for item in list(sys.meta_path):
+        if item is finder or (finder is None and isinstance(item, Finder)):
+            sys.meta_path.remove(item)
@@ -60,3 +60,12 @@ for h in [objname.AutoName()]:
 
 for i, j in [objname.AutoName()]:
     pass
+
+
+class Falsy(objname.AutoName):
+    def __bool__(self) -> bool:
+        return False
+
+
+or_default = objname.AutoName() or None
+and_default = Falsy() and None
@@ -0,0 +1,865 @@
+"""Benchmark suite of objname.
+
+Each benchmark is run some times to warm up, then it is timed many times.
+The median and the standard deviation of the time per operation are
+reported. The results can be saved as JSON and compared with a previous
+run, e.g. to catch regressions between Python versions:
+
+    $ python -m objname.bench --json before.json
+    $ python3.13 -m objname.bench --compare before.json
+"""
+
+from types import CodeType, ModuleType
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+import argparse
+import ast
+import dis
+import json
+import marshal
+import os
+import pickle
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import weakref
+
+import objname
+
+
+# The code of each benchmark is run many times inside a loop, so that the
+# overhead of the timer is negligible.
+LOOPS = 1_000
+
+
+# A benchmark returns the function to time and the number of operations
+# that such function does.
+_Setup = Callable[[int], Tuple[Callable[[], Any], int]]
+_BENCHMARKS: Dict[str, _Setup] = {}
+_MEMORY_BENCHMARKS: Dict[str, Callable[[], float]] = {}
+
+
+def benchmark(name: str) -> Callable[[_Setup], _Setup]:
+    """Register a time benchmark. The decorated function receives how many
+    times the returned function will be called.
+    """
+    def decorator(setup: _Setup) -> _Setup:
+        _BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+def memory_benchmark(
+    name: str
+) -> Callable[[Callable[[], float]], Callable[[], float]]:
+    "Register a benchmark that returns the bytes used by each object."
+    def decorator(setup: Callable[[], float]) -> Callable[[], float]:
+        _MEMORY_BENCHMARKS[name] = setup
+        return setup
+    return decorator
+
+
+# Compile the source of a function named 'run', so that each benchmark
+# has the exact bytecode that it needs.
+def _function(source: str, **namespace: Any) -> Callable[[], Any]:
+    namespace.setdefault("objname", objname)
+    namespace.setdefault("LOOPS", LOOPS)
+    exec(source, namespace)
+    return namespace["run"]  # type: ignore[no-any-return]
+
+
+def _single_run(function: Callable[[], Any]) -> _Setup:
+    def setup(runs: int) -> Tuple[Callable[[], Any], int]:
+        return function, LOOPS
+    return setup
+
+
+# Local variables
+# ===============
+
+
+benchmark("local")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        x = objname.AutoName()
+""")))
+
+
+benchmark("local_slotted")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        x = objname.SlottedAutoName()
+""")))
+
+
+class _Lazy(objname.AutoName, lazy=True):
+    pass
+
+
+benchmark("local_lazy")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        x = Lazy()
+""", Lazy=_Lazy)))
+
+
+benchmark("local_lazy_read")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        x = Lazy()
+        x.name
+""", Lazy=_Lazy)))
+
+
+@benchmark("local_stats_enabled")
+def _local_stats_enabled(runs: int) -> Tuple[Callable[[], Any], int]:
+    function = _function("""
+def run():
+    for _ in range(LOOPS):
+        x = objname.AutoName()
+""")
+
+    def run() -> None:
+        objname.enable_stats()
+        try:
+            function()
+        finally:
+            objname.disable_stats()
+    return run, LOOPS
+
+
+# The cost of verify() with the given rate.
+def _local_verify(rate: float) -> _Setup:
+    function = _function("""
+def run():
+    for _ in range(LOOPS):
+        x = objname.AutoName()
+""")
+
+    def setup(runs: int) -> Tuple[Callable[[], Any], int]:
+        def run() -> None:
+            objname.verify(rate)
+            try:
+                function()
+            finally:
+                objname.verify(0)
+        return run, LOOPS
+    return setup
+
+
+benchmark("local_verify[0.001]")(_local_verify(0.001))
+benchmark("local_verify[0.01]")(_local_verify(0.01))
+
+
+benchmark("chained_assignment")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        a = b = c = objname.AutoName()
+""")))
+
+
+benchmark("for_loop_target")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        for x in [objname.AutoName()]:
+            pass
+""")))
+
+
+benchmark("attribute_target")(_single_run(_function("""
+class Holder:
+    pass
+
+def run():
+    holder = Holder()
+    for _ in range(LOOPS):
+        holder.attr = objname.AutoName()
+""")))
+
+
+benchmark("cell_variable")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        x = objname.AutoName()
+
+    def inner():
+        return x
+""")))
+
+
+benchmark("cell_variable_unpack")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        a, b = objname.AutoName()
+
+    def inner():
+        return a, b
+""")))
+
+
+# A variable of the enclosing function, assigned with nonlocal.
+@benchmark("free_variable")
+def _free_variable(runs: int) -> Tuple[Callable[[], Any], int]:
+    function = _function("""
+def run():
+    x = None
+
+    def inner():
+        nonlocal x
+        for _ in range(LOOPS):
+            x = objname.AutoName()
+    return inner
+""")()
+    return function, LOOPS
+
+
+benchmark("global_variable")(_single_run(_function("""
+def run():
+    global x
+    for _ in range(LOOPS):
+        x = objname.AutoName()
+""")))
+
+
+# EXTENDED_ARG is needed for the local variables after the 256th.
+benchmark("extended_arg")(_single_run(_function("""
+def run():
+    {} = None
+    for _ in range(LOOPS):
+        v299 = objname.AutoName()
+""".format(" = ".join(f"v{i}" for i in range(300))))))
+
+
+benchmark("nameless")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        objname.AutoName()
+""")))
+
+
+benchmark("nameless_argument")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        str(objname.AutoName())
+""")))
+
+
+# Module and class namespaces
+# ===========================
+
+
+@benchmark("module_variable")
+def _module_variable(runs: int) -> Tuple[Callable[[], Any], int]:
+    code = compile(
+        "for _ in range(LOOPS):\n    x = objname.AutoName()\n",
+        "<module_variable>", "exec")
+    namespace = {"objname": objname, "LOOPS": LOOPS}
+    return (lambda: exec(code, namespace)), LOOPS
+
+
+benchmark("class_namespace")(_single_run(_function("""
+def run():
+    class Namespace:
+        for _ in range(LOOPS):
+            attr = objname.AutoName()
+""")))
+
+
+class _ReverseLookup(objname.AutoName, reverse_lookup=True):
+    pass
+
+
+class _PlainClass:
+    pass
+
+
+# Objects created at the top of a module with 100 other variables, by
+# each engine: the bytecode scanner, the lazy scanner and the search in
+# the namespace. A plain class is the reference. With read=True the name
+# of each object is read too.
+def _engine(cls: type, read: bool) -> _Setup:
+    source = "for _ in range(LOOPS):\n    x = Symbol()\n"
+    if read:
+        source += "    x.name\n"
+    code = compile(source, "<engine>", "exec")
+    namespace: Dict[str, Any] = {f"v{i}": i for i in range(100)}
+    namespace.update(Symbol=cls, LOOPS=LOOPS)
+    return _single_run(lambda: exec(code, namespace))
+
+
+for _engine_name, _cls in (
+        ("scan", objname.AutoName), ("lazy", _Lazy),
+        ("reverse_lookup", _ReverseLookup), ("plain", _PlainClass)):
+    benchmark(f"engine[{_engine_name}]")(_engine(_cls, False))
+    if _cls is not _PlainClass:
+        benchmark(f"engine_read[{_engine_name}]")(_engine(_cls, True))
+
+
+# Subclasses
+# ==========
+
+
+def _subclass(depth: int) -> type:
+    cls: type = objname.AutoName
+    for i in range(depth):
+        namespace: Dict[str, Any] = {}
+        exec("def __init__(self):\n    super(cls, self).__init__()\n",
+             namespace)
+
+        # The super() call needs the new class, so it is set later.
+        cls = type(f"Depth{i + 1}", (cls,), {
+            "__init__": namespace["__init__"]})
+        namespace["cls"] = cls
+    return cls
+
+
+for _depth in range(1, 11):
+    benchmark(f"subclass_depth[{_depth}]")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        x = Subclass()
+""", Subclass=_subclass(_depth))))
+
+
+# Iterable unpacking
+# ==================
+
+
+for _count in (3, 20, 200):
+    benchmark(f"unpack_sequence[{_count}]")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        {} = objname.AutoName()
+""".format(", ".join(f"v{i}" for i in range(_count))))))
+
+
+# Registry
+# ========
+
+
+class _Registered(objname.AutoName, registry=True):
+    pass
+
+
+benchmark("local_registry")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        x = Registered()
+""", Registered=_Registered)))
+
+
+@benchmark("lookup")
+def _lookup(runs: int) -> Tuple[Callable[[], Any], int]:
+    objects = _Registered.from_names(f"x{i}" for i in range(LOOPS))
+    return _function("""
+def run():
+    for _ in range(LOOPS):
+        Registered.lookup("x500")
+""", Registered=_Registered, objects=objects), LOOPS
+
+
+# Origin
+# ======
+
+
+class _WithOrigin(objname.AutoName, origin=True):
+    pass
+
+
+class _SlottedWithOrigin(objname.SlottedAutoName, origin=True):
+    __slots__ = ("origin",)
+
+
+benchmark("local_origin")(_single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        x = WithOrigin()
+""", WithOrigin=_WithOrigin)))
+
+
+# The line is searched in the line table each time that it is read.
+@benchmark("origin_read")
+def _origin_read(runs: int) -> Tuple[Callable[[], Any], int]:
+    obj = _WithOrigin()
+    return _function("""
+def run():
+    origin = obj.origin
+    for _ in range(LOOPS):
+        origin.filename, origin.line, origin.qualname
+""", obj=obj), LOOPS
+
+
+# Factories
+# =========
+
+
+class _FromFactory(objname.AutoName, factory_depth=3):
+    pass
+
+
+# The object is created by a chain of 'depth' factory functions. With
+# depth=0 it is created by the assignment, for reference.
+def _factory(depth: int) -> _Setup:
+    lines = ["def factory_0():", "    return FromFactory()"]
+    for level in range(1, depth):
+        lines += [
+            f"def factory_{level}():", f"    return factory_{level - 1}()"]
+    call = f"factory_{depth - 1}()" if depth else "FromFactory()"
+    lines += [
+        "def run():", "    for _ in range(LOOPS):", f"        x = {call}"]
+    return _single_run(_function(
+        "\n".join(lines), FromFactory=_FromFactory))
+
+
+for _depth in (0, 1, 3):
+    benchmark(f"factory[{_depth}]")(_factory(_depth))
+
+
+# Resolvers
+# =========
+
+
+# Each registered resolver. Iterable unpacking is not used, because the
+# "explicit" resolver doesn't support it.
+def _resolver(name: str) -> _Setup:
+    cls = type(f"Resolver_{name}", (objname.AutoName,), {}, resolver=name)
+    return _single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        x = Symbol()
+""", Symbol=cls))
+
+
+for _resolver_name in list(objname._resolvers):
+    benchmark(f"resolver[{_resolver_name}]")(_resolver(_resolver_name))
+
+
+# Explicit names
+# ==============
+
+
+@benchmark("named")
+def _named(runs: int) -> Tuple[Callable[[], Any], int]:
+    return _function("""
+def run():
+    for _ in range(LOOPS):
+        objname.AutoName.named("x")
+"""), LOOPS
+
+
+@benchmark("from_names")
+def _from_names(runs: int) -> Tuple[Callable[[], Any], int]:
+    names = [f"x{i}" for i in range(LOOPS)]
+    return (lambda: objname.AutoName.from_names(names)), LOOPS
+
+
+@benchmark("plain_object")
+def _plain_object(runs: int) -> Tuple[Callable[[], Any], int]:
+    "The lower bound of from_names."
+    return _function("""
+class Plain:
+    def __init__(self, name):
+        self.name = name
+
+def run():
+    for _ in range(LOOPS):
+        Plain("x")
+"""), LOOPS
+
+
+# The same than 'local', but rewritten by the import hook.
+@benchmark("import_hook")
+def _import_hook(runs: int) -> Tuple[Callable[[], Any], int]:
+    from objname import _hook
+    tree = _hook.rewrite(ast.parse("""
+def run():
+    for _ in range(LOOPS):
+        x = objname.AutoName()
+"""))
+    namespace: Dict[str, Any] = {"objname": objname, "LOOPS": LOOPS}
+    exec(compile(tree, "<import_hook>", "exec"), namespace)
+    return namespace["run"], LOOPS
+
+
+# Cold call sites
+# ===============
+
+
+# 100 nameless objects at the top of a module with 50k instructions. Each
+# run needs a new code object, so that nothing was computed before.
+@benchmark("nameless_in_large_module")
+def _nameless_in_large_module(runs: int) -> Tuple[Callable[[], Any], int]:
+    source = "objname.AutoName()\n" * 100 + "len\n" * 25_000
+    codes = [compile(source, "<large module>", "exec") for _ in range(runs)]
+    return (lambda: exec(codes.pop(), {"objname": objname})), 100
+
+
+# A generated script with 5k objects, run by exec() once for each tenant.
+# Each run uses a new code object of the same source, as if it were
+# compiled again. Only the first one is scanned if the code objects share
+# their data. Use '--warmup 1 --repeat 99' to run it 100 times.
+@benchmark("exec_generated")
+def _exec_generated(runs: int) -> Tuple[Callable[[], Any], int]:
+    source = "".join(
+        f"v{i} = objname.AutoName()\n" for i in range(5_000))
+    data = marshal.dumps(compile(source, "<generated>", "exec"))
+    codes = [marshal.loads(data) for _ in range(runs)]
+    return (lambda: exec(codes.pop(), {"objname": objname})), 5_000
+
+
+# The first call of 100 functions, each one with their own object. Each
+# run uses a new module. With warm=True the modules are warmed before.
+# Each function has other variable, so that no code object has the same
+# content than other one.
+def _first_construction(warm: bool) -> _Setup:
+    source = "".join(
+        f"def f{i}():\n    x{i}_{{0}} = objname.AutoName()\n"
+        for i in range(100))
+    source += f"functions = [{', '.join(f'f{i}' for i in range(100))}]\n"
+
+    def setup(runs: int) -> Tuple[Callable[[], Any], int]:
+        modules = []
+        for index in range(runs):
+            module = ModuleType("first_construction")
+            module.objname = objname  # type: ignore[attr-defined]
+            exec(source.format(index), vars(module))
+            if warm:
+                objname.warm(module)
+            modules.append(module)
+
+        def run() -> None:
+            module = modules.pop()
+            for function in module.functions:  # type: ignore[attr-defined]
+                function()
+        return run, 100
+    return setup
+
+
+benchmark("first_construction[cold]")(_first_construction(warm=False))
+benchmark("first_construction[warm]")(_first_construction(warm=True))
+
+
+# Startup of a module with 200 objects, as if each run were a new process.
+# With cache=None the disk cache is disabled. With cache="cold" there is
+# no file yet and with cache="warm" the file was written before.
+def _startup(cache: Optional[str]) -> _Setup:
+    from objname import _disk
+    source = "".join(f"v{i} = objname.AutoName()\n" for i in range(200))
+
+    def setup(runs: int) -> Tuple[Callable[[], Any], int]:
+        directory = tempfile.TemporaryDirectory()
+        path = os.path.join(directory.name, "startup.py")
+        with open(path, "w") as file:
+            file.write(source)
+        if cache == "warm":
+            objname.enable_disk_cache()
+            exec(compile(source, path, "exec"), {"objname": objname})
+            objname.disable_disk_cache()
+        codes = [compile(source, path, "exec") for _ in range(runs)]
+
+        def run() -> None:
+            directory  # The directory is kept until the benchmark ends.
+            if cache is not None:
+                objname._disk_cache = _disk.DiskCache()
+            try:
+                exec(codes.pop(), {"objname": objname})
+            finally:
+                if objname._disk_cache is not None:
+                    objname._disk_cache.close()
+                objname._disk_cache = None
+        return run, 200
+    return setup
+
+
+benchmark("startup[no_disk_cache]")(_startup(None))
+benchmark("startup[cold_disk_cache]")(_startup("cold"))
+benchmark("startup[warm_disk_cache]")(_startup("warm"))
+
+
+# Scanner
+# =======
+
+
+# Cost of a scan without the call site cache. The inline caches of python
+# 3.11 and newer follow the attribute and unpacking instructions, so the
+# results of different versions should be compared with --compare.
+def _scan(source: str) -> _Setup:
+    code = compile(source, "<scan>", "exec")
+
+    # The code of the function named 'function', if the source defines
+    # one. It can be nested in other functions.
+    codes = [code]
+    for item in codes:
+        if item.co_name == "function":
+            code = item
+            break
+        codes.extend(
+            const for const in item.co_consts if isinstance(const, CodeType))
+    info = objname._CodeInfo(weakref.ref(code))
+    lasti = next(
+        instruction.offset
+        for instruction in dis.get_instructions(code)
+        if instruction.opname.startswith("CALL"))
+    # The code object is kept alive, because the bytecode is decoded by
+    # the first scan.
+    return _single_run(_function("""
+def run():
+    for _ in range(LOOPS):
+        scan(info, lasti)
+""", scan=objname._scan, info=info, lasti=lasti, code=code))
+
+
+benchmark("scan[attribute]")(_scan("obj.attr = A()"))
+benchmark("scan[chained_attributes]")(_scan("a.x = b.y = c.z = A()"))
+benchmark("scan[unpack]")(_scan("a, b, c = A()"))
+benchmark("scan[unpack_extended_arg]")(_scan("{} = A()".format(
+    ", ".join(f"v{i}" for i in range(300)))))
+
+
+# Python 3.13 stores two local variables with a single instruction.
+benchmark("scan[local_chained]")(_scan("""
+def function():
+    a = b = c = A()
+"""))
+benchmark("scan[local_unpack]")(_scan("""
+def function():
+    a, b, c, d = A()
+"""))
+
+
+# Since python 3.11 the cell and free variables are indexed after the
+# local variables.
+benchmark("scan[cell]")(_scan("""
+def function(arg):
+    a, b = c = A()
+    return lambda: (arg, a, b, c)
+"""))
+benchmark("scan[free]")(_scan("""
+def outer():
+    a = b = None
+    def function():
+        nonlocal a, b
+        a, b = A()
+"""))
+
+
+# Pickle
+# ======
+
+
+class _Pickled(objname.AutoName):
+    def __init__(self, type: object) -> None:
+        super().__init__()
+        self.type = type
+
+
+# The pickle protocol that AutoName had before __reduce__ was defined.
+class _DefaultPickled(_Pickled):
+    __reduce__ = object.__reduce__  # type: ignore[assignment]
+
+
+# 1000 objects with 100 different names. Each name is a different string,
+# as if they were received from other process.
+def _pickled(cls: Type[_Pickled]) -> List[Any]:
+    return [cls.named(f"x{i % 100}", int) for i in range(LOOPS)]
+
+
+_PICKLE_FORMATS: Dict[str, Tuple[Callable[..., bytes], Callable[..., Any]]] = {
+    "default": (pickle.dumps, pickle.loads),
+    "reduce": (pickle.dumps, pickle.loads),
+    "pack_objects": (objname.pack_objects, objname.unpack_objects),
+}
+
+
+def _pickle_round_trip(format: str) -> _Setup:
+    dumps, loads = _PICKLE_FORMATS[format]
+    objects = _pickled(_DefaultPickled if format == "default" else _Pickled)
+    return _single_run(lambda: loads(dumps(objects)))
+
+
+def _pickle_size(format: str) -> Callable[[], float]:
+    dumps, _ = _PICKLE_FORMATS[format]
+    cls = _DefaultPickled if format == "default" else _Pickled
+    return lambda: len(dumps(_pickled(cls))) / LOOPS
+
+
+for _format in _PICKLE_FORMATS:
+    benchmark(f"pickle[{_format}]")(_pickle_round_trip(_format))
+    memory_benchmark(f"pickle[{_format}]")(_pickle_size(_format))
+
+
+# Threads
+# =======
+
+
+# Each thread creates and unpacks objects at the same time than the
+# others. The time is per object, so it is the same for each amount of
+# threads if they don't scale, e.g. with the GIL, and it gets lower if
+# they do, e.g. in the free-threaded builds.
+_threaded = _function("""
+def run():
+    for _ in range(LOOPS):
+        x = objname.AutoName()
+        a, b = objname.AutoName()
+""")
+
+
+def _threads(count: int) -> _Setup:
+    def setup(runs: int) -> Tuple[Callable[[], Any], int]:
+        def run() -> None:
+            threads = [
+                threading.Thread(target=_threaded) for _ in range(count)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        return run, 3 * count * LOOPS
+    return setup
+
+
+for _count in (1, 2, 4, 8):
+    benchmark(f"threads[{_count}]")(_threads(_count))
+
+
+# Memory
+# ======
+
+
+def _memory_per_instance(cls: type) -> float:
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    objects = []
+    for i in range(10_000):
+        obj = cls()
+        objects.append(obj)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    size = sum(s.size_diff for s in after.compare_to(before, "filename"))
+    size -= sys.getsizeof(objects)
+    return size / len(objects)
+
+
+memory_benchmark("AutoName")(lambda: _memory_per_instance(objname.AutoName))
+memory_benchmark("SlottedAutoName")(
+    lambda: _memory_per_instance(objname.SlottedAutoName))
+memory_benchmark("AutoName[origin]")(
+    lambda: _memory_per_instance(_WithOrigin))
+memory_benchmark("SlottedAutoName[origin]")(
+    lambda: _memory_per_instance(_SlottedWithOrigin))
+
+
+# Runner
+# ======
+
+
+def run_benchmark(
+    setup: _Setup,
+    warmup: int,
+    repeat: int,
+) -> Dict[str, float]:
+    "Return the statistics of the time per operation, in nanoseconds."
+    function, operations = setup(warmup + repeat)
+    for _ in range(warmup):
+        function()
+    times: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        end = time.perf_counter()
+        times.append((end - start) / operations * 1e9)
+    return {
+        "median": statistics.median(times),
+        "stdev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "min": min(times),
+        "runs": len(times),
+    }
+
+
+def run_all(
+    pattern: str = "",
+    warmup: int = 3,
+    repeat: int = 20,
+) -> Dict[str, Any]:
+    "Run the benchmarks whose name contains 'pattern'."
+    results: Dict[str, Any] = {
+        "python": sys.version,
+        "implementation": platform.python_implementation(),
+        "objname": objname.__version__,
+        "time": {},
+        "memory": {},
+    }
+    for name, setup in _BENCHMARKS.items():
+        if pattern in name:
+            results["time"][name] = run_benchmark(setup, warmup, repeat)
+    for name, memory_setup in _MEMORY_BENCHMARKS.items():
+        if pattern in name:
+            results["memory"][name] = memory_setup()
+    return results
+
+
+def _report(
+    results: Dict[str, Any],
+    baseline: Optional[Dict[str, Any]] = None,
+    threshold: float = 0.1,
+) -> List[str]:
+    "Print the results and return the names of the regressions."
+    regressions = []
+    for name, stats in results["time"].items():
+        line = (f"{name:<30} {stats['median']:>12.1f} ns/op "
+                f"+- {stats['stdev']:.1f}")
+        if baseline and name in baseline["time"]:
+            ratio = stats["median"] / baseline["time"][name]["median"]
+            line += f"   x{ratio:.2f}"
+            if ratio > 1 + threshold:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line)
+    for name, size in results["memory"].items():
+        line = f"{f'memory[{name}]':<30} {size:>12.1f} bytes"
+        if baseline and name in baseline["memory"]:
+            line += f"   x{size / baseline['memory'][name]:.2f}"
+        print(line)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m objname.bench", description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "-k", "--pattern", default="",
+        help="only run the benchmarks whose name contains PATTERN")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--json", metavar="FILE", help="save the results in FILE")
+    parser.add_argument(
+        "--compare", metavar="FILE",
+        help="compare with the results saved in FILE")
+    parser.add_argument(
+        "--threshold", type=float, default=0.1,
+        help="slowdown reported as a regression (default: 0.1)")
+    parser.add_argument(
+        "--list", action="store_true", help="list the benchmarks and exit")
+    args = parser.parse_args(argv)
+    if args.list:
+        for name in [*_BENCHMARKS, *_MEMORY_BENCHMARKS]:
+            print(name)
+        return 0
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    results = run_all(args.pattern, args.warmup, args.repeat)
+    regressions = _report(results, baseline, args.threshold)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
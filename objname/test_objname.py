@@ -1,9 +1,20 @@
-from typing import Tuple
+from typing import Any, Callable, Dict, List, Tuple
+from unittest import mock
+import ast
+import copy
+import dis
+import functools
+import importlib
+import os
+import pickle
 import sys
+import tempfile
+import threading
+import types
 import unittest
 
 import objname
-from . import _module
+from . import _disk, _hook, _module
 
 
 class LocalVariableSuite(unittest.TestCase):
@@ -94,12 +105,113 @@ class LocalVariableSuite(unittest.TestCase):
     def test_default_name(self) -> None:
         self.assertEqual(objname.AutoName().name, "<nameless>")
 
+    def test_nameless_argument(self) -> None:
+        value = str(objname.AutoName().name)
+        self.assertEqual(value, "<nameless>")
+
+    def test_conditional_expression(self) -> None:
+        condition = True
+        obj = objname.AutoName() if condition else None
+        self.assertEqual(obj.name, "obj")  # type: ignore[union-attr]
+
+    def test_or_default(self) -> None:
+        obj = objname.AutoName() or None
+        self.assertEqual(obj.name, "obj")  # type: ignore[union-attr]
+
+    def test_and_default(self) -> None:
+        class Falsy(objname.AutoName):
+            def __bool__(self) -> bool:
+                return False
+
+        obj = Falsy() and None
+        self.assertEqual(obj.name, "obj")  # type: ignore[union-attr]
+
+        # The default is stored, not the object.
+        default = Falsy() or None
+        self.assertIsNone(default)
+
+    def test_raised(self) -> None:
+        class Error(objname.AutoName, Exception):
+            pass
+
+        def function(condition: bool) -> None:
+            if condition:
+                raise Error()
+            else:
+                value = 1
+
+        with self.assertRaises(Error) as context:
+            function(True)
+        self.assertEqual(context.exception.name, "<nameless>")
+
     def test_inside_function(self) -> None:
         def function() -> objname.AutoName:
             inner = objname.AutoName()
             return inner
         self.assertEqual(function().name, "inner")
 
+    def test_multiple_assignment_inside_function(self) -> None:
+        def function() -> objname.AutoName:
+            a = b = objname.AutoName()
+            return a
+        self.assertEqual(function().name, "b")
+
+    def test_decorated_init(self) -> None:
+        def decorator(function: Callable[..., None]) -> Callable[..., None]:
+            @functools.wraps(function)
+            def wrapper(*args: Any, **kwargs: Any) -> None:
+                function(*args, **kwargs)
+            return wrapper
+
+        class Decorated(objname.AutoName):
+            @decorator
+            def __init__(self) -> None:
+                super().__init__()
+
+        obj = Decorated()
+        self.assertEqual(obj.name, "obj")
+
+    def test_cooperative_mixin(self) -> None:
+        class Mixin:
+            def __init__(self) -> None:
+                super().__init__()
+
+        class Cooperative(Mixin, objname.AutoName):
+            def __init__(self) -> None:
+                super().__init__()
+
+        obj = Cooperative()
+        self.assertEqual(obj.name, "obj")
+
+    def test_created_inside_own_init(self) -> None:
+        class Node(objname.AutoName):
+            def __init__(self, depth: int) -> None:
+                super().__init__()
+                if depth:
+                    self.child = Node(depth - 1)
+
+        tree = Node(2)
+        self.assertEqual(tree.name, "tree")
+        self.assertEqual(tree.child.name, "child")
+        self.assertEqual(tree.child.child.name, "child")
+
+    def test_subclass_created_later(self) -> None:
+        class Base(objname.AutoName):
+            def __init__(self) -> None:
+                super().__init__()
+
+        base = Base()
+
+        class Child(Base):
+            def __init__(self) -> None:
+                super().__init__()
+
+        child = Child()
+        base_again = Base()
+        self.assertEqual(
+            (base.name, child.name, base_again.name),
+            ("base", "child", "base_again"))
+
     def test_extended_arg_opcode(self) -> None:
         _000 = objname.AutoName()
         _001 = objname.AutoName()
@@ -404,6 +516,20 @@ class LocalVariableSuite(unittest.TestCase):
         self.assertEqual(foo.name, "foo")
         self.assertEqual(var.name, "var")
 
+    def test_unpacked_objects_are_initialized(self) -> None:
+        class Counter(objname.AutoName):
+            calls = 0
+
+            def __init__(self, value: int) -> None:
+                super().__init__()
+                Counter.calls += 1
+                self.value = value
+
+        a, b = Counter(1)
+        self.assertEqual(Counter.calls, 3)
+        self.assertEqual((a.name, a.value), ("a", 1))
+        self.assertEqual((b.name, b.value), ("b", 1))
+
     def test_autoname_instance_as_object_attribute(self) -> None:
         class Object:
             def __init__(self) -> None:
@@ -529,6 +655,39 @@ class CellVariableSuite(unittest.TestCase):
         self.assertEqual(x.name, "x")
         self.assertEqual(y.name, "y")
 
+    def test_argument_captured_by_closure(self) -> None:
+        def function(arg: int) -> objname.AutoName:
+            cell = objname.AutoName()
+
+            def inner() -> Tuple[int, objname.AutoName]:
+                return arg, cell
+            return inner()[1]
+        self.assertEqual(function(1).name, "cell")
+
+    def test_argument_stored_in_cell(self) -> None:
+        def function(arg: object) -> Tuple[str, str]:
+            arg = objname.AutoName()
+            local, cell = objname.AutoName()
+
+            def inner() -> Tuple[object, objname.AutoName]:
+                return arg, cell
+            return inner()[0].name, cell.name  # type: ignore[attr-defined]
+        self.assertEqual(function(1), ("arg", "cell"))
+
+    def test_free_variables(self) -> None:
+        a = b = c = d = objname.AutoName()
+
+        def inner() -> objname.AutoName:
+            nonlocal a, b, c, d
+            a = objname.AutoName()
+            b, c = objname.AutoName()
+            d = e = objname.AutoName()
+            return e
+        e = inner()
+        self.assertEqual(
+            (a.name, b.name, c.name, d.name, e.name),
+            ("a", "b", "c", "e", "e"))
+
 
 class ModuleVariableSuite(unittest.TestCase):
     def test_single_assignment(self) -> None:
@@ -566,6 +725,14 @@ class ModuleVariableSuite(unittest.TestCase):
         self.assertEqual(_module.i.name, "i")
         self.assertEqual(_module.j.name, "j")
 
+    def test_or_default(self) -> None:
+        obj = _module.or_default
+        self.assertEqual(obj.name, "or_default")  # type: ignore[union-attr]
+
+    def test_and_default(self) -> None:
+        obj = _module.and_default
+        self.assertEqual(obj.name, "and_default")  # type: ignore[union-attr]
+
 
 # Global variables for GlobalVariableSuite
 # ========================================
@@ -779,6 +946,1220 @@ class IterableUnpackingAndMultipleAssignmentCase(unittest.TestCase):
         self.assertEqual(f.name, "f")
 
 
+class CallSiteCacheSuite(unittest.TestCase):
+    def test_same_call_site(self) -> None:
+        for _ in range(3):
+            a = objname.AutoName()
+            b, c = objname.AutoName()
+            self.assertEqual(a.name, "a")
+            self.assertEqual(b.name, "b")
+            self.assertEqual(c.name, "c")
+
+    def test_dynamic_code_is_forgotten(self) -> None:
+        code = compile("x = objname.AutoName()", "<test>", "exec")
+        namespace = {"objname": objname}
+        exec(code, namespace)
+        self.assertEqual(namespace["x"].name, "x")
+        key = id(code)
+        self.assertIn(key, objname._code_infos)
+        del code
+        self.assertNotIn(key, objname._code_infos)
+
+    def test_inline_caches_are_skipped(self) -> None:
+        code = compile("a.b, c = d.e = objname.AutoName()", "<test>", "exec")
+        info = objname._get_code_info(code)
+        info.decode(code)
+        offsets = []
+        index = 0
+        while index < len(info.kinds):  # type: ignore[arg-type]
+            offsets.append(2 * index)
+            index += info.steps[index]
+        expected = [i.offset for i in dis.get_instructions(code)]
+        self.assertEqual(offsets, expected)
+
+    def test_same_content_is_shared(self) -> None:
+        source = "x, y = objname.AutoName()\nz = objname.AutoName()"
+        objname.enable_stats()
+        try:
+            with mock.patch.multiple(
+                    objname, _shared_infos={}, _shared_bytecode=0):
+                for _ in range(3):
+                    namespace = {"objname": objname}
+                    exec(compile(source, "<shared>", "exec"), namespace)
+                    self.assertEqual(
+                        [namespace[n].name for n in "xyz"], ["x", "y", "z"])
+            self.assertEqual(objname.stats()["cache_misses"], 2)
+        finally:
+            objname.disable_stats()
+
+        # Other names are other content.
+        namespace = {"objname": objname}
+        exec(compile(source.replace("z", "w"), "<shared>", "exec"), namespace)
+        self.assertEqual(namespace["w"].name, "w")
+
+    def test_later_resolutions_are_shared(self) -> None:
+        source = (
+            "def f(first):\n"
+            "    if first:\n"
+            "        a = objname.AutoName()\n"
+            "    else:\n"
+            "        b = objname.AutoName()\n"
+            "    return a if first else b\n")
+        objname.enable_stats()
+        try:
+            with mock.patch.multiple(
+                    objname, _shared_infos={}, _shared_bytecode=0):
+                functions = []
+                for _ in range(2):
+                    namespace: Dict[str, Any] = {"objname": objname}
+                    exec(compile(source, "<shared>", "exec"), namespace)
+                    functions.append(namespace["f"])
+                self.assertEqual([f(True).name for f in functions], ["a"] * 2)
+                self.assertEqual(
+                    [f(False).name for f in functions], ["b"] * 2)
+            self.assertEqual(objname.stats()["cache_misses"], 2)
+        finally:
+            objname.disable_stats()
+
+    def test_shared_bytecode_is_bounded(self) -> None:
+        with mock.patch.multiple(
+                objname, _shared_infos={}, _shared_bytecode=0,
+                _SHARED_BYTECODE=1):
+            for name in "abc":
+                exec(f"{name} = objname.AutoName()", {"objname": objname})
+            self.assertEqual(len(objname._shared_infos), 1)
+            self.assertEqual(
+                objname._shared_bytecode,
+                len(next(iter(objname._shared_infos))[0]))
+
+            # The code of a file is never shared.
+            code = compile("d = objname.AutoName()", "file.py", "exec")
+            exec(code, {"objname": objname})
+            self.assertEqual(len(objname._shared_infos), 1)
+
+
+class SlottedAutoNameSuite(unittest.TestCase):
+    def test_single_assignment(self) -> None:
+        obj = objname.SlottedAutoName()
+        self.assertEqual(obj.name, "obj")
+        self.assertFalse(hasattr(obj, "__dict__"))
+
+    def test_unpacking(self) -> None:
+        x, y = objname.SlottedAutoName()
+        self.assertEqual(x.name, "x")
+        self.assertEqual(y.name, "y")
+
+    def test_default_name(self) -> None:
+        self.assertEqual(objname.SlottedAutoName().name, "<nameless>")
+
+    def test_subclass_arguments(self) -> None:
+        class Symbol(objname.SlottedAutoName):
+            __slots__ = ("type",)
+
+            def __init__(self, type: object) -> None:
+                super().__init__()
+                self.type = type
+
+        x = Symbol(int)
+        a, b = Symbol(complex)
+        self.assertEqual((x.name, x.type), ("x", int))
+        self.assertEqual((a.name, a.type), ("a", complex))
+        self.assertEqual((b.name, b.type), ("b", complex))
+
+    def test_arguments_are_not_kept(self) -> None:
+        value = object()
+        ref_count = sys.getrefcount(value)
+
+        class Symbol(objname.SlottedAutoName):
+            __slots__ = ()
+
+            def __init__(self, value: object) -> None:
+                super().__init__()
+
+        x = Symbol(value)
+        self.assertEqual(x.name, "x")
+        self.assertEqual(sys.getrefcount(value), ref_count)
+
+
+class ExplicitNameSuite(unittest.TestCase):
+    def test_named(self) -> None:
+        x = objname.AutoName.named("y")
+        self.assertEqual(x.name, "y")
+
+    def test_from_names(self) -> None:
+        objects = objname.AutoName.from_names(["a", "b", "c"])
+        self.assertEqual([obj.name for obj in objects], ["a", "b", "c"])
+
+    def test_subclass_arguments(self) -> None:
+        class Numeric:
+            def __init__(self, type: object) -> None:
+                self.__type__ = type
+
+        class Symbol(Numeric, objname.AutoName):
+            def __init__(self, type: object) -> None:
+                Numeric.__init__(self, type)
+                objname.AutoName.__init__(self)
+
+        x = Symbol.named("y", complex)
+        a, b = Symbol.from_names("ab", type=int)
+        self.assertIsInstance(x, Symbol)
+        self.assertEqual((x.name, x.__type__), ("y", complex))
+        self.assertEqual((a.name, a.__type__), ("a", int))
+        self.assertEqual((b.name, b.__type__), ("b", int))
+
+    def test_name_keyword(self) -> None:
+        class Labeled(objname.AutoName):
+            def __init__(self, name: str = "", names: str = "") -> None:
+                super().__init__()
+                self.label = name + names
+
+        x = Labeled.named("x", name="l")
+        a, b = Labeled.from_names("ab", names="m")
+        self.assertEqual((x.name, x.label), ("x", "l"))
+        self.assertEqual((a.name, a.label, b.name), ("a", "m", "b"))
+        with self.assertRaises(TypeError):
+            Labeled.named(name="x")
+        with self.assertRaises(TypeError):
+            Labeled.from_names(names="ab")
+
+    def test_slotted(self) -> None:
+        x = objname.SlottedAutoName.named("y")
+        self.assertEqual(x.name, "y")
+
+
+class LazySuite(unittest.TestCase):
+    def test_single_assignment(self) -> None:
+        class Symbol(objname.AutoName, lazy=True):
+            pass
+
+        x = Symbol()
+        self.assertNotIn("name", vars(x))
+        self.assertEqual(x.name, "x")
+        self.assertIn("name", vars(x))
+
+    def test_unpacking(self) -> None:
+        class Symbol(objname.AutoName, lazy=True):
+            def __init__(self, type: object) -> None:
+                super().__init__()
+                self.type = type
+
+        a, b = Symbol(int)
+        self.assertEqual((a.name, a.type), ("a", int))
+        self.assertEqual((b.name, b.type), ("b", int))
+
+    def test_default_name(self) -> None:
+        class Symbol(objname.AutoName, lazy=True):
+            pass
+
+        self.assertEqual(Symbol().name, "<nameless>")
+        self.assertEqual(Symbol.name, "<nameless>")
+
+    def test_inherited(self) -> None:
+        class Symbol(objname.AutoName, lazy=True):
+            pass
+
+        class Real(Symbol):
+            pass
+
+        x = Real()
+        self.assertNotIn("name", vars(x))
+        self.assertEqual(x.name, "x")
+
+    def test_slotted(self) -> None:
+        class Symbol(objname.SlottedAutoName, lazy=True):
+            __slots__ = ()
+
+        x = Symbol()
+        a, b = Symbol()
+        self.assertEqual(x.name, "x")
+        self.assertEqual(a.name, "a")
+        self.assertEqual(b.name, "b")
+
+
+class RLSymbol(objname.AutoName, reverse_lookup=True):
+    pass
+
+
+class ReverseLookupSuite(unittest.TestCase):
+    def run_module(self, source: str) -> Dict[str, Any]:
+        namespace = {"RLSymbol": RLSymbol}
+        exec(compile(source, "<reverse_lookup>", "exec"), namespace)
+        return namespace
+
+    def test_module(self) -> None:
+        namespace = self.run_module("x = RLSymbol()")
+        with mock.patch.object(objname, "_scan") as scan:
+            self.assertEqual(namespace["x"].name, "x")
+        scan.assert_not_called()
+
+    def test_class_body(self) -> None:
+        class Namespace:
+            attr = RLSymbol()
+        with mock.patch.object(objname, "_scan") as scan:
+            self.assertEqual(Namespace.attr.name, "attr")
+        scan.assert_not_called()
+
+    def test_fall_back_to_the_bytecode(self) -> None:
+        namespace = self.run_module("x = RLSymbol()\ny = x\na, b = RLSymbol()")
+        self.assertEqual(namespace["y"].name, "x")
+        a, b = namespace["a"], namespace["b"]
+        self.assertEqual((a.name, b.name), ("a", "b"))
+        x = RLSymbol()
+        self.assertEqual(x.name, "x")
+
+    def test_not_lazy(self) -> None:
+        with self.assertRaises(TypeError):
+            class Symbol(objname.AutoName, lazy=False, reverse_lookup=True):
+                pass
+
+
+class ResolverSuite(unittest.TestCase):
+    def test_scan(self) -> None:
+        class Symbol(objname.AutoName, resolver="scan"):
+            pass
+
+        with mock.patch.object(objname, "_scan", wraps=objname._scan) as scan:
+            for _ in range(3):
+                a, b = Symbol()
+        self.assertEqual((a.name, b.name), ("a", "b"))
+        self.assertEqual(scan.call_count, 3)
+
+    def test_explicit(self) -> None:
+        class Symbol(objname.AutoName, resolver="explicit"):
+            pass
+
+        x = Symbol()
+        y = Symbol.named("y")
+        self.assertEqual((x.name, y.name), ("<nameless>", "y"))
+
+    def test_register(self) -> None:
+        def resolver(code: types.CodeType, lasti: int) -> Any:
+            return f"{code.co_name}_{lasti}", ()
+
+        with mock.patch.dict(objname._resolvers):
+            objname.register_resolver("location", resolver)
+            with self.assertRaises(ValueError):
+                objname.register_resolver("location", resolver)
+
+            class Symbol(objname.AutoName, resolver="location"):
+                pass
+
+            class Lazy(Symbol, lazy=True):
+                pass
+
+        x = Symbol()
+        y = Lazy()
+        self.assertTrue(x.name.startswith("test_register_"))
+        self.assertTrue(y.name.startswith("test_register_"))
+        self.assertNotEqual(x.name, y.name)
+        with self.assertRaises(ValueError):
+            class Unknown(objname.AutoName, resolver="location"):
+                pass
+
+    def test_default(self) -> None:
+        class Symbol(objname.AutoName, resolver="explicit"):
+            pass
+
+        class Cached(Symbol, resolver="cache"):
+            pass
+
+        x = Cached()
+        self.assertEqual(x.name, "x")
+
+
+class RegistrySuite(unittest.TestCase):
+    def test_lookup(self) -> None:
+        class Symbol(objname.AutoName, registry=True):
+            pass
+
+        x = Symbol()
+        a, b = Symbol()
+        c = Symbol.named("c")
+        d, e = Symbol.from_names(["d", "e"])
+        Symbol()
+        for obj in (x, a, b, c, d, e):
+            self.assertIs(Symbol.lookup(obj.name), obj)
+        self.assertEqual(
+            sorted(obj.name for obj in Symbol.registered()),
+            ["a", "b", "c", "d", "e", "x"])
+        with self.assertRaises(KeyError):
+            Symbol.lookup("<nameless>")
+
+    def test_multiplicity(self) -> None:
+        class Symbol(objname.AutoName, registry=True):
+            pass
+
+        first = [Symbol.named("x") for _ in range(3)]
+        x = Symbol()
+        self.assertEqual(Symbol.lookup_all("x"), first + [x])
+        self.assertIs(Symbol.lookup("x"), first[0])
+        del first[0]
+        self.assertIs(Symbol.lookup("x"), first[0])
+
+    def test_objects_are_not_kept_alive(self) -> None:
+        class Symbol(objname.AutoName, registry=True):
+            pass
+
+        x = Symbol()
+        del x
+        self.assertEqual(Symbol.lookup_all("x"), [])
+        self.assertEqual(
+            Symbol._registry.objects, {})  # type: ignore[union-attr]
+
+    def test_lazy(self) -> None:
+        class Symbol(objname.AutoName, lazy=True, registry=True):
+            pass
+
+        x = Symbol()
+        self.assertEqual(Symbol.lookup_all("x"), [])
+        self.assertEqual(x.name, "x")
+        self.assertIs(Symbol.lookup("x"), x)
+
+    def test_subclasses_share_the_registry(self) -> None:
+        class Symbol(objname.AutoName, registry=True):
+            pass
+
+        class Real(Symbol):
+            def __init__(self) -> None:
+                super().__init__()
+
+        class Private(Symbol, registry=False):
+            pass
+
+        x = Real()
+        y = Private()
+        self.assertIs(Symbol.lookup("x"), x)
+        self.assertIs(Real.lookup("x"), x)
+        self.assertEqual(Symbol.lookup_all("y"), [])
+        with self.assertRaises(TypeError):
+            Private.lookup("y")
+
+    def test_slotted(self) -> None:
+        class Symbol(objname.SlottedAutoName, registry=True):
+            __slots__ = ("__weakref__",)
+
+        x = Symbol()
+        self.assertIs(Symbol.lookup("x"), x)
+        with self.assertRaises(TypeError):
+            class Compact(objname.SlottedAutoName, registry=True):
+                __slots__ = ()
+
+    def test_renamed(self) -> None:
+        class Symbol(objname.AutoName, registry=True):
+            pass
+
+        class Compact(objname.SlottedAutoName, registry=True):
+            __slots__ = ("__weakref__",)
+
+        class Private(Symbol, registry=False):
+            pass
+
+        for cls in (Symbol, Compact):
+            r = cls()
+            s = cls()
+            r.name = "s"
+            self.assertEqual(cls.lookup_all("r"), [])
+            self.assertEqual(cls.lookup_all("s"), [s, r])
+            del s
+            self.assertIs(cls.lookup("s"), r)
+            self.assertEqual(
+                cls._registry.objects.keys(),  # type: ignore[union-attr]
+                {"s"})
+        p = Private()
+        p.name = "q"
+        self.assertEqual(Symbol.lookup_all("q"), [])
+
+    def test_without_registry(self) -> None:
+        with self.assertRaises(TypeError):
+            objname.AutoName.lookup("x")
+
+
+class WithOrigin(objname.AutoName, origin=True):
+    pass
+
+
+class SlottedWithOrigin(objname.SlottedAutoName, origin=True):
+    __slots__ = ("origin",)
+
+    def __init__(self, value: object = None) -> None:
+        super().__init__()
+
+
+class OriginSuite(unittest.TestCase):
+    def test_origin(self) -> None:
+        line = sys._getframe().f_lineno + 1
+        x = WithOrigin()
+        origin = x.origin
+        assert origin is not None
+        self.assertEqual(origin.filename, __file__)
+        self.assertEqual(origin.line, line)
+        self.assertEqual(origin.qualname, getattr(
+            self.test_origin.__code__, "co_qualname", "test_origin"))
+        self.assertIs(origin.code, sys._getframe().f_code)
+        self.assertIn(f"{__file__}:{line}", repr(origin))
+
+    def test_slotted(self) -> None:
+        line = sys._getframe().f_lineno + 1
+        a, b = SlottedWithOrigin(1)
+        self.assertIs(a.origin, b.origin)
+        assert a.origin is not None
+        self.assertEqual(a.origin.line, line)
+        x = SlottedWithOrigin.named("x")
+        self.assertIsNone(x.origin)
+        with self.assertRaises(TypeError):
+            class Symbol(objname.SlottedAutoName, origin=True):
+                __slots__ = ()
+
+    def test_disabled(self) -> None:
+        x = objname.AutoName()
+        self.assertIsNone(x.origin)
+        self.assertNotIn("origin", vars(x))
+
+    def test_import_hook(self) -> None:
+        tree = _hook.rewrite(ast.parse("\n\nx = WithOrigin()"))
+        namespace = {"WithOrigin": WithOrigin}
+        exec(compile(tree, "<origin>", "exec"), namespace)
+        origin = namespace["x"].origin
+        assert origin is not None
+        self.assertEqual((origin.filename, origin.line), ("<origin>", 3))
+
+    def test_not_pickled(self) -> None:
+        x = WithOrigin()
+        y = SlottedWithOrigin()
+        self.assertIsNone(pickle.loads(pickle.dumps(x)).origin)
+        self.assertIsNone(pickle.loads(pickle.dumps(y)).origin)
+        self.assertIsNone(copy.deepcopy(x).origin)
+
+
+class FSymbol(objname.AutoName, factory_depth=2):
+    @classmethod
+    def create(cls) -> "FSymbol":
+        return cls()
+
+
+def make_symbol() -> FSymbol:
+    return FSymbol()
+
+
+def make_symbol_twice() -> FSymbol:
+    return make_symbol()
+
+
+def make_symbol_thrice() -> FSymbol:
+    return make_symbol_twice()
+
+
+async def async_make_symbol() -> FSymbol:
+    return FSymbol()
+
+
+class FactorySuite(unittest.TestCase):
+    def test_factory(self) -> None:
+        x = make_symbol()
+        self.assertEqual(x.name, "x")
+        y = FSymbol.create()
+        self.assertEqual(y.name, "y")
+
+    def test_nested_factories(self) -> None:
+        x = make_symbol_twice()
+        self.assertEqual(x.name, "x")
+        y = make_symbol_thrice()
+        self.assertEqual(y.name, "<nameless>")
+
+    def test_unpacking(self) -> None:
+        a, b = make_symbol_twice()
+        self.assertEqual((a.name, b.name), ("a", "b"))
+
+    def test_await(self) -> None:
+        async def main() -> FSymbol:
+            x = await async_make_symbol()
+            return x
+
+        with self.assertRaises(StopIteration) as context:
+            main().send(None)
+        self.assertEqual(context.exception.value.name, "x")
+
+    def test_not_returned(self) -> None:
+        def discard() -> None:
+            FSymbol()
+
+        def register(symbol: FSymbol) -> FSymbol:
+            return symbol
+
+        def helper() -> FSymbol:
+            return register(FSymbol())
+
+        x = discard()  # type: ignore[func-returns-value]
+        y = helper()
+        self.assertIsNone(x)
+        self.assertEqual(y.name, "<nameless>")
+
+    def test_disabled(self) -> None:
+        def factory() -> objname.AutoName:
+            return objname.AutoName()
+
+        x = factory()
+        self.assertEqual(x.name, "<nameless>")
+        with self.assertRaises(TypeError):
+            class Lazy(objname.AutoName, lazy=True, factory_depth=1):
+                pass
+        with self.assertRaises(ValueError):
+            class Negative(objname.AutoName, factory_depth=-1):
+                pass
+
+
+class PSymbol(objname.AutoName):
+    def __init__(self, type: object) -> None:
+        super().__init__()
+        self.type = type
+
+
+class PSlotted(objname.SlottedAutoName, registry=True):
+    __slots__ = ("type", "__private", "__weakref__")
+
+    def __init__(self, type: object) -> None:
+        super().__init__()
+        self.type = type
+        self.__private = type
+
+
+class PLazy(objname.AutoName, lazy=True):
+    pass
+
+
+class PCustom(objname.AutoName):
+    def __getstate__(self) -> str:
+        return "state"
+
+    def __setstate__(self, state: str) -> None:
+        self.restored = state
+
+
+class PickleSuite(unittest.TestCase):
+    def tearDown(self) -> None:
+        objname.disable_stats()
+
+    def assert_no_construction(self) -> None:
+        self.assertEqual(objname.stats()["constructions"], 0)
+
+    def test_pickle(self) -> None:
+        x = PSymbol(int)
+        a, b = PSymbol(float)
+        objname.enable_stats()
+        for obj in (x, a, b):
+            loaded = pickle.loads(pickle.dumps(obj))
+            self.assertEqual((loaded.name, loaded.type), (obj.name, obj.type))
+            self.assertNotIn(b"_unpacking", pickle.dumps(obj))
+            self.assertEqual(obj.__reduce__()[2], {"type": obj.type})
+            self.assertIsNone(loaded._unpacking)
+        self.assert_no_construction()
+
+    def test_slotted(self) -> None:
+        x = PSlotted([1])
+        loaded = pickle.loads(pickle.dumps(x))
+        self.assertEqual((loaded.name, loaded.type), ("x", [1]))
+        self.assertEqual(loaded._PSlotted__private, [1])
+        self.assertIn(loaded, PSlotted.lookup_all("x"))
+
+    def test_lazy_and_nameless(self) -> None:
+        x = PLazy()
+        loaded = pickle.loads(pickle.dumps(x))
+        self.assertEqual(loaded.name, "x")
+        nameless = pickle.loads(pickle.dumps(objname.AutoName()))
+        self.assertEqual(nameless.name, "<nameless>")
+        self.assertNotIn("name", vars(nameless))
+
+    def test_custom_state(self) -> None:
+        x = PCustom()
+        self.assertEqual(pickle.loads(pickle.dumps(x)).restored, "state")
+        self.assertEqual(copy.copy(x).restored, "state")
+
+    def test_copy(self) -> None:
+        x = PSymbol([1])
+        objname.enable_stats()
+        shallow = copy.copy(x)
+        deep = copy.deepcopy(x)
+        self.assertEqual((shallow.name, deep.name), ("x", "x"))
+        self.assertIs(shallow.type, x.type)
+        self.assertIsNot(deep.type, x.type)
+        self.assertEqual(deep.type, x.type)
+        self.assert_no_construction()
+
+    def test_deepcopy_cycle(self) -> None:
+        x = PSymbol(None)
+        x.type = x
+        deep = copy.deepcopy(x)
+        self.assertIs(deep.type, deep)
+
+    def test_pack_objects(self) -> None:
+        objects: List[Any] = []
+        for _ in range(100):
+            a, b = PSymbol(int)
+            x = PSlotted(str)
+            objects += [a, b, x]
+        objname.enable_stats()
+        data = objname.pack_objects(objects)
+        self.assertLess(len(data), len(pickle.dumps(objects)))
+        loaded = objname.unpack_objects(data)
+        self.assertEqual(
+            [(obj.name, type(obj), obj.type) for obj in loaded],
+            [(obj.name, type(obj), obj.type) for obj in objects])
+        self.assert_no_construction()
+
+
+class ThreadSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        interval = sys.getswitchinterval()
+        self.addCleanup(sys.setswitchinterval, interval)
+        sys.setswitchinterval(1e-6)
+
+    def test_concurrent_names(self) -> None:
+        barrier = threading.Barrier(8)
+        results: List[Any] = []
+
+        def create() -> None:
+            barrier.wait()
+            for _ in range(200):
+                x = PSymbol(int)
+                a, b = objname.AutoName()
+                c, d = PSymbol.from_names("cd", float)
+                y = PSlotted(str)
+                results.append((
+                    x.name, a.name, b.name, c.name, d.name, y.name,
+                    PSlotted.lookup("y").name))
+
+        threads = [threading.Thread(target=create) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(
+            results, [("x", "a", "b", "c", "d", "y", "y")] * 1600)
+
+
+class StatsSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        objname.enable_stats()
+
+    def tearDown(self) -> None:
+        objname.disable_stats()
+
+    def test_counters(self) -> None:
+        code = compile("\n".join((
+            "for _ in range(3):",
+            "    x = objname.AutoName()",
+            "    a, b = objname.AutoName()",
+            "    objname.AutoName()",
+        )), "<stats>", "exec")
+        exec(code, {"objname": objname})
+        data = objname.stats()
+        self.assertEqual(data["constructions"], 9)
+        self.assertEqual(data["nameless"], 3)
+        self.assertEqual(data["unpack_fan_out"], {2: 3})
+        self.assertEqual(data["cache_misses"], 3)
+        self.assertEqual(data["cache_hits"], 6)
+        self.assertGreater(data["instructions_scanned"], 0)
+        self.assertEqual(
+            data["call_sites"],
+            [("<stats>:2 (<module>)", 3), ("<stats>:3 (<module>)", 3),
+             ("<stats>:4 (<module>)", 3)])
+        del code
+        self.assertEqual(objname.stats()["cache_evictions"], 1)
+        self.assertIn("9 constructions", objname.format_stats())
+
+    def test_disabled(self) -> None:
+        objname.disable_stats()
+        x = objname.AutoName()
+        self.assertEqual(x.name, "x")
+        self.assertEqual(objname.stats()["constructions"], 0)
+
+
+class VerifySuite(unittest.TestCase):
+    def setUp(self) -> None:
+        objname.verify(1)
+
+    def tearDown(self) -> None:
+        objname.verify(0)
+
+    def test_no_mismatches(self) -> None:
+        code = compile("\n".join((
+            "for _ in range(3):",
+            "    x = objname.AutoName()",
+            "    a, b = objname.AutoName()",
+        )), "<verify>", "exec")
+        objname.enable_stats()
+        try:
+            exec(code, {"objname": objname})
+            self.assertEqual(objname.stats()["cache_misses"], 2)
+        finally:
+            objname.disable_stats()
+
+        # The first construction of each call site is not checked,
+        # because it was already scanned.
+        data = objname.verification()
+        self.assertEqual((data["rate"], data["checks"]), (1, 4))
+        self.assertGreater(data["seconds"], 0)
+        self.assertEqual(data["mismatches"], [])
+
+    def test_independent_of_scanner(self) -> None:
+        code = compile("x = objname.AutoName()", "<verify>", "exec")
+        with mock.patch.object(objname, "_scan", return_value=("y", ())):
+            for _ in range(2):
+                exec(code, {"objname": objname})
+        mismatch, = objname.verification()["mismatches"]
+        self.assertEqual(
+            (mismatch["expected"], mismatch["found"]), (("x", ()), ("y", ())))
+
+    def test_reference_scan(self) -> None:
+        module = compile("\n".join((
+            "a = b, c = objname.AutoName()",
+            "d, e = f, g = objname.AutoName()",
+            "h = objname.AutoName() if True else None",
+            "i.j = objname.AutoName()",
+            "objname.AutoName()",
+            "def function():",
+            "    k = objname.AutoName()",
+            "    l, m = objname.AutoName()",
+            "    return objname.AutoName()",
+        )), "<verify>", "exec")
+        function, = [
+            const for const in module.co_consts
+            if isinstance(const, types.CodeType)]
+        for code in (module, function):
+            info = objname._get_code_info(code)
+            for instruction in dis.get_instructions(code):
+                if instruction.opname.startswith("CALL"):
+                    lasti = instruction.offset
+                    self.assertEqual(
+                        objname._reference_scan(code, lasti),
+                        objname._scan(info, lasti))
+
+    def test_mismatch(self) -> None:
+        code = compile("x = objname.AutoName()", "<verify>", "exec")
+        exec(code, {"objname": objname})
+        info = objname._code_infos[id(code)]
+        lasti, = info.sites
+        info.sites[lasti] = ("y", ())
+        for _ in range(2):
+            namespace = {"objname": objname}
+            exec(code, namespace)
+        self.assertEqual(namespace["x"].name, "y")
+        self.assertEqual(objname.verification()["mismatches"], [{
+            "location": "<verify>:1 (<module>)",
+            "lasti": lasti,
+            "path": "cache",
+            "expected": ("x", ()),
+            "found": ("y", ()),
+            "count": 2,
+        }])
+
+    def test_import_hook(self) -> None:
+        tree = _hook.rewrite(ast.parse("\n".join((
+            "a = b = objname.AutoName()",
+            "c, d = objname.AutoName()",
+        ))))
+        exec(compile(tree, "<verify>", "exec"), {"objname": objname})
+        data = objname.verification()
+        self.assertEqual((data["checks"], data["mismatches"]), (2, []))
+
+    def test_reverse_lookup(self) -> None:
+        namespace = {"RLSymbol": RLSymbol}
+        exec("x = RLSymbol()", namespace)
+        self.assertEqual(namespace["x"].name, "x")
+        data = objname.verification()
+        self.assertEqual((data["checks"], data["mismatches"]), (1, []))
+
+    def test_resolver(self) -> None:
+        def resolver(code: types.CodeType, lasti: int) -> Any:
+            return "wrong", ()
+
+        with mock.patch.dict(objname._resolvers):
+            objname.register_resolver("wrong", resolver)
+
+            class Symbol(objname.AutoName, resolver="wrong"):
+                pass
+
+            class Lazy(Symbol, lazy=True):
+                pass
+
+        x = Symbol()
+        y = Lazy()
+        self.assertEqual((x.name, y.name), ("wrong", "wrong"))
+        mismatches = objname.verification()["mismatches"]
+        self.assertEqual(
+            [(m["path"], m["expected"], m["found"]) for m in mismatches],
+            [("wrong", ("x", ()), ("wrong", ())),
+             ("wrong", ("y", ()), ("wrong", ()))])
+
+    def test_explicit_resolver(self) -> None:
+        class Symbol(objname.AutoName, resolver="explicit"):
+            pass
+
+        x = Symbol()
+        data = objname.verification()
+        self.assertEqual((data["checks"], data["mismatches"]), (0, []))
+
+    def test_factory(self) -> None:
+        def factory() -> FSymbol:
+            return FSymbol()
+
+        with mock.patch.object(
+                objname, "_resolve", return_value=("wrong", ())):
+            x = factory()
+        self.assertEqual(x.name, "wrong")
+        mismatch, = objname.verification()["mismatches"]
+        self.assertEqual(
+            (mismatch["path"], mismatch["expected"], mismatch["found"]),
+            ("factory", ("x", ()), ("wrong", ())))
+
+    def test_rate(self) -> None:
+        objname.verify(0.1)
+        for _ in range(1000):
+            x = objname.AutoName()
+        data = objname.verification()
+        self.assertEqual(data["rate"], 0.1)
+        self.assertTrue(20 < data["checks"] < 300)
+        objname.verify(0)
+        self.assertEqual(objname.verification()["checks"], 0)
+        with self.assertRaises(ValueError):
+            objname.verify(2)
+
+
+# Import this module and _module again, with the import hook installed.
+def _import_rewritten() -> types.ModuleType:
+    names = ["objname._module", "objname.test_objname"]
+    hook = objname.install_import_hook(names)
+    try:
+        with mock.patch.dict(sys.modules), mock.patch.dict(vars(objname)):
+            for name in names:
+                sys.modules.pop(name, None)
+                vars(objname).pop(name.rpartition(".")[2], None)
+            return importlib.import_module("objname.test_objname")
+    finally:
+        objname.uninstall_import_hook(hook)
+
+
+class ImportHookSuite(unittest.TestCase):
+    def run_rewritten(self, source: str) -> types.SimpleNamespace:
+        tree = _hook.rewrite(ast.parse(source))
+        namespace = {"objname": objname}
+        exec(compile(tree, "<rewritten>", "exec"), namespace)
+        return types.SimpleNamespace(**namespace)
+
+    def test_equivalence(self) -> None:
+        rewritten = _import_rewritten()
+        self.assertTrue(hasattr(rewritten, "_objname_call_named"))
+        self.assertTrue(hasattr(rewritten._module, "_objname_call_named"))
+        loader = unittest.defaultTestLoader
+        suite = unittest.TestSuite(
+            loader.loadTestsFromTestCase(getattr(rewritten, name))
+            for name in ("LocalVariableSuite", "CellVariableSuite",
+                         "ModuleVariableSuite", "GlobalVariableSuite"))
+        result = unittest.TestResult()
+        suite.run(result)
+        self.assertEqual(result.errors + result.failures, [])
+        self.assertGreater(result.testsRun, 0)
+
+    def test_no_frame_is_inspected(self) -> None:
+        objname.enable_stats()
+        try:
+            namespace = self.run_rewritten("\n".join((
+                "a = b = objname.AutoName()",
+                "c, d = objname.SlottedAutoName()",
+                "e = c, f = objname.AutoName()",
+                "class Namespace:",
+                "    attr: objname.AutoName = objname.AutoName()",
+            )))
+
+            # The statistics count each object created from a frame.
+            self.assertEqual(objname.stats()["constructions"], 0)
+        finally:
+            objname.disable_stats()
+        self.assertEqual(namespace.a.name, "b")
+        self.assertEqual((namespace.c.name, namespace.d.name), ("c", "d"))
+        self.assertEqual((namespace.e.name, namespace.f.name), ("e", "f"))
+        self.assertEqual(namespace.Namespace.attr.name, "attr")
+
+    def test_keyword_arguments(self) -> None:
+        namespace = self.run_rewritten("\n".join((
+            "class Symbol(objname.AutoName):",
+            "    def __init__(self, callee, resolution=None):",
+            "        super().__init__()",
+            "        self.args = callee, resolution",
+            "x = Symbol(callee=1, resolution=2)",
+            "y = Exception(3)",
+        )))
+        self.assertEqual(namespace.x.name, "x")
+        self.assertEqual(namespace.x.args, (1, 2))
+        self.assertEqual(namespace.y.args, (3,))
+
+    def test_unsupported_targets_use_the_bytecode(self) -> None:
+        namespace = self.run_rewritten("\n".join((
+            '"Docstring"',
+            "from __future__ import division",
+            "items = {}",
+            "items[0] = objname.AutoName()",
+            "class Namespace:",
+            "    __private = objname.AutoName()",
+        )))
+        self.assertEqual(namespace.items[0].name, "<nameless>")
+        self.assertEqual(
+            namespace.Namespace._Namespace__private.name,
+            "_Namespace__private")
+
+    def test_callers_frame(self) -> None:
+        module = types.ModuleType("objname_rewritten")
+        source = "\n".join((
+            "import enum, typing",
+            "T = typing.TypeVar('T')",
+            "Color = enum.Enum('Color', 'RED GREEN')",
+        ))
+        plain = types.ModuleType(module.__name__)
+        exec(source, vars(plain))
+        tree = _hook.rewrite(ast.parse(source))
+        with mock.patch.dict(sys.modules, {module.__name__: module}):
+            exec(compile(tree, "<rewritten>", "exec"), vars(module))
+            self.assertEqual(module.T.__module__, plain.T.__module__)
+            self.assertEqual(module.Color.__module__, module.__name__)
+            red = pickle.loads(pickle.dumps(module.Color.RED))
+            self.assertIs(red, module.Color.RED)
+
+    def test_metaclass_call(self) -> None:
+        calls = []
+
+        class Meta(type):
+            def __call__(cls, *args: Any, **kwargs: Any) -> Any:
+                calls.append(cls)
+                return super().__call__(*args, **kwargs)
+
+        class Symbol(objname.AutoName, metaclass=Meta):
+            pass
+
+        tree = _hook.rewrite(ast.parse("x = Symbol()"))
+        namespace: Dict[str, Any] = {"Symbol": Symbol}
+        exec(compile(tree, "<rewritten>", "exec"), namespace)
+        self.assertEqual(calls, [Symbol])
+        self.assertIsInstance(namespace["x"], Symbol)
+
+    def test_uninstall(self) -> None:
+        hook = objname.install_import_hook(["objname._module"])
+        self.assertIn(hook, sys.meta_path)
+        objname.uninstall_import_hook()
+        self.assertNotIn(hook, sys.meta_path)
+
+
+# Create a module that is not warmed yet.
+def _make_module(name: str, source: str) -> types.ModuleType:
+    module = types.ModuleType(name)
+    module.objname = objname  # type: ignore[attr-defined]
+    exec(compile(source, f"<{name}>", "exec"), vars(module))
+    return module
+
+
+class WarmSuite(unittest.TestCase):
+    def tearDown(self) -> None:
+        objname.disable_stats()
+
+    def test_no_bytecode_is_scanned_later(self) -> None:
+        module = _make_module("warmed", "\n".join((
+            "def function():",
+            "    x = objname.AutoName()",
+            "    return x, (lambda: [objname.AutoName() for _ in 'a'])()",
+            "class Class:",
+            "    @staticmethod",
+            "    def method():",
+            "        a, b = objname.AutoName()",
+            "        return a, b",
+            "    @property",
+            "    def attribute(self):",
+            "        self.y = objname.AutoName()",
+            "        return self.y",
+        )))
+        self.assertEqual(objname.warm(module), 5)
+        self.assertEqual(objname.warm(module), 0)
+        objname.enable_stats()
+        x, items = module.function()  # type: ignore[attr-defined]
+        a, b = module.Class.method()  # type: ignore[attr-defined]
+        y = module.Class().attribute  # type: ignore[attr-defined]
+        self.assertEqual(x.name, "x")
+        self.assertEqual(items[0].name, "<nameless>")
+        self.assertEqual((a.name, b.name), ("a", "b"))
+        self.assertEqual(y.name, "y")
+        self.assertEqual(objname.stats()["cache_misses"], 0)
+
+    def test_package(self) -> None:
+        package = _make_module("package", "")
+        package.__path__ = []  # type: ignore[attr-defined]
+        submodule = _make_module("package.submodule", "\n".join((
+            "def function():",
+            "    return objname.AutoName()",
+        )))
+        other = _make_module("packages", "\n".join((
+            "def function():",
+            "    return objname.AutoName()",
+        )))
+        with mock.patch.dict(sys.modules, {
+                "package.submodule": submodule, "packages": other}):
+            self.assertEqual(objname.warm(package), 1)
+        self.assertIn(
+            id(submodule.function.__code__),  # type: ignore[attr-defined]
+            objname._code_infos)
+        self.assertNotIn(
+            id(other.function.__code__),  # type: ignore[attr-defined]
+            objname._code_infos)
+
+    def test_unrelated_functions_are_skipped(self) -> None:
+        module = _make_module("unrelated", "\n".join((
+            "from objname import format_stats",
+            "def function():",
+            "    return format_stats()",
+        )))
+        self.assertEqual(objname.warm(module), 0)
+        self.assertNotIn(
+            id(module.function.__code__),  # type: ignore[attr-defined]
+            objname._code_infos)
+
+
+class DiskCacheSuite(unittest.TestCase):
+    def setUp(self) -> None:
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "cached.py")
+        self.write("\n".join((
+            "a = objname.AutoName()",
+            "b, c = objname.AutoName()",
+            "def function():",
+            "    return objname.AutoName()",
+        )))
+
+    def tearDown(self) -> None:
+        objname.disable_disk_cache()
+        objname.disable_stats()
+
+    def write(self, source: str) -> None:
+        with open(self.path, "w") as file:
+            file.write(source)
+
+    # Run the source file as if it were a new process.
+    def run_source(self) -> Tuple[Any, int]:
+        with open(self.path) as file:
+            code = compile(file.read(), self.path, "exec")
+        namespace: Dict[str, Any] = {"objname": objname}
+        objname.enable_disk_cache()
+        objname.enable_stats()
+        try:
+            exec(code, namespace)
+            names = [namespace[n].name for n in "abc"]
+            names.append(namespace["function"]().name)
+            return names, objname.stats()["cache_misses"]
+        finally:
+            objname.disable_stats()
+            objname.disable_disk_cache()
+
+    def test_names_are_persisted(self) -> None:
+        self.assertEqual(self.run_source(), (["a", "b", "c", "<nameless>"], 3))
+        self.assertEqual(self.run_source(), (["a", "b", "c", "<nameless>"], 0))
+        cache_dir = os.path.join(os.path.dirname(self.path), "__pycache__")
+        self.assertTrue(any(
+            n.endswith(".objname") for n in os.listdir(cache_dir)))
+
+    def test_source_change(self) -> None:
+        self.run_source()
+        self.write("\n".join((
+            "c = objname.AutoName()",
+            "b, a = objname.AutoName()",
+            "def function():",
+            "    d = objname.AutoName()",
+            "    return d",
+        )))
+        self.assertEqual(self.run_source(), (["a", "b", "c", "d"], 3))
+        self.assertEqual(self.run_source(), (["a", "b", "c", "d"], 0))
+
+    def test_dynamic_code_is_not_persisted(self) -> None:
+        objname.enable_disk_cache()
+        code = compile("x = objname.AutoName()", "<dynamic>", "exec")
+        exec(code, {"objname": objname})
+        self.assertIsNone(objname._disk_cache.sites["<dynamic>"])
+
+    def test_resolutions_found_during_flush(self) -> None:
+        objname.enable_disk_cache()
+        with open(self.path) as file:
+            code = compile(file.read(), self.path, "exec")
+        exec(code, {"objname": objname})
+        sites = objname._code_infos[id(code)].sites
+
+        # Other thread finds a resolution while the file is written.
+        def write(source: str, records: Dict[int, bytes]) -> None:
+            sites[-1] = ("late", ())
+
+        with mock.patch.object(_disk, "_write", side_effect=write):
+            objname.flush_disk_cache()
+        loaded, = [
+            loaded for entry, loaded
+            in objname._disk_cache.sites[self.path].values()
+            if entry is sites]
+        self.assertEqual(loaded, len(sites) - 1)
+
+    def test_load_during_flush(self) -> None:
+        self.run_source()
+        with open(self.path) as file:
+            code = compile(file.read(), self.path, "exec")
+        function, = [
+            const for const in code.co_consts
+            if isinstance(const, types.CodeType)]
+        objname.enable_disk_cache()
+        exec(code, {"objname": objname})
+        objname._code_infos[id(code)].sites[-1] = ("new", ())
+        cache = objname._disk_cache
+        errors = []
+
+        # Other thread loads the file that flush() is replacing.
+        def load() -> None:
+            try:
+                cache.load(function, {})
+            except Exception as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=load)
+        write = _disk._write
+
+        def write_while_loading(
+                source: str, records: Dict[int, bytes]) -> None:
+            thread.start()
+            thread.join(0.1)
+            self.assertTrue(thread.is_alive())
+            write(source, records)
+
+        with mock.patch.object(
+                _disk, "_write", side_effect=write_while_loading):
+            cache.flush()
+        thread.join()
+        self.assertEqual(errors, [])
+
+    def test_snapshot_retry(self) -> None:
+        class Changing(dict):  # type: ignore[type-arg]
+            changes = 2
+
+            def __iter__(self) -> Any:
+                if self.changes:
+                    self.changes -= 1
+                    raise RuntimeError("dictionary changed size")
+                return super().__iter__()
+
+            def keys(self) -> Any:
+                return list(self)
+
+        self.assertEqual(_disk._snapshot(Changing(a=1)), {"a": 1})
+
+    def test_flush_at_exit(self) -> None:
+        objname.enable_disk_cache()
+        with mock.patch.object(
+                objname._disk_cache, "flush", side_effect=OSError):
+            objname._flush_at_exit()
+            with self.assertRaises(OSError):
+                objname.flush_disk_cache()
+
+
 if __name__ == '__main__':
 
     # A weird bug with global variables can only be tested here